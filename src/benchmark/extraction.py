@@ -0,0 +1,59 @@
+import time
+from typing import Dict, Any, List
+
+from src.extraction.extraction import (
+    find_string_matches,
+    find_all_string_matches,
+)
+
+
+def benchmark_string_matching(
+    texts: List[str],
+    entity_strings: List[List[str]],
+    repeats: int = 3,
+) -> Dict[str, Any]:
+    """Times locating the extracted strings of each note with one regex per string
+    and with a single Aho-Corasick automaton per note, and checks that both give the same matches.
+
+    Args:
+        texts (List[str]): Notes the entities were extracted from, ideally long notes.
+        entity_strings (List[List[str]]): Extracted strings of each note, duplicates are allowed.
+        repeats (int, optional): Number of timed runs per path, the fastest is kept. Defaults to 3.
+
+    Returns:
+        Dict[str, Any]: Notes per second for each path, the speed up of the automaton
+                        and whether the two paths returned identical matches.
+    """
+    n_notes = len(texts)
+    results = {
+        "n_notes": n_notes,
+        "n_strings": sum(len(strings) for strings in entity_strings),
+    }
+    matches = {}
+
+    paths = {
+        "regex": lambda text, strings: {
+            string: find_string_matches(text, string) for string in strings
+        },
+        "automaton": find_all_string_matches,
+    }
+    for name, find_matches in paths.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            matches[name] = [
+                find_matches(text, strings)
+                for text, strings in zip(texts, entity_strings)
+            ]
+            timings.append(time.perf_counter() - start)
+        results[f"{name}_notes_per_sec"] = n_notes / min(timings)
+
+    results["speed_up"] = (
+        results["automaton_notes_per_sec"] / results["regex_notes_per_sec"]
+    )
+    results["identical"] = matches["regex"] == matches["automaton"]
+
+    for key, value in results.items():
+        print(f"{key}: {value}")
+
+    return results
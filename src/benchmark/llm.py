@@ -0,0 +1,172 @@
+import time
+import tempfile
+import pandas as pd
+from typing import Dict, Any, List, Optional, Union, Callable
+
+from src.benchmark.mock_ollama import MockOllamaServer
+from src.config.global_config import GlobalConfig
+from src.config.experimental_config import GenerateConfig
+from src.extraction.extraction import create_patients_entities
+from src.generate.llm import GenerateLLM
+from src.llm_cache import LLMResponseCache
+
+
+def benchmark_generation(
+    global_config: GlobalConfig,
+    generate_config: GenerateConfig,
+    synthea_records: List[Dict[str, Any]],
+    concurrency_levels: List[int] = [1, 2, 4, 8],
+    latency: float = 0.05,
+    default_response: str = "Mock medical note.",
+) -> pd.DataFrame:
+    """Benchmarks GenerateLLM end to end against a local MockOllamaServer, so no model,
+    network or GPU is needed.
+
+    Throughput is measured for each concurrency level without a cache, then the highest
+    concurrency level is run twice with an empty response cache to measure a cold and a
+    warm cache. The cache lives in a temporary folder, so the LLM cache in the global config
+    is never filled with mock responses.
+
+    Args:
+        global_config (GlobalConfig): This is a pydantic typing model that contains configuration parameters from global config.
+        generate_config (GenerateConfig): Generate config, its base_url is pointed at the mock server.
+        synthea_records (List[Dict[str, Any]]): Synthea records to generate notes for.
+        concurrency_levels (List[int], optional): Values of max_concurrency to try. Defaults to [1, 2, 4, 8].
+        latency (float, optional): Seconds the mock server waits per request. Defaults to 0.05.
+        default_response (str, optional): Note returned by the mock server. Defaults to "Mock medical note.".
+
+    Raises:
+        RuntimeError: If the warm cache run sends any request to the mock server.
+
+    Returns:
+        pd.DataFrame: Notes per second, latency percentiles, requests sent and cache hit rate of each run.
+    """
+    rows = []
+    with MockOllamaServer(
+        default_response=default_response, latency=latency
+    ) as server:
+        llm_model_features = generate_config.llm_model_features.model_copy(
+            update={"base_url": server.base_url}
+        )
+
+        def run_generation(
+            run: str, max_concurrency: int, cache: Optional[LLMResponseCache]
+        ) -> None:
+            config = generate_config.model_copy(
+                update={
+                    "llm_model_features": llm_model_features,
+                    "max_concurrency": max_concurrency,
+                    "path_output": None,
+                }
+            )
+            generator = GenerateLLM(
+                global_config, config, synthea_input=synthea_records
+            )
+            generator.llm_cache = cache
+            server.reset_stats()
+            # path_output is None so nothing is loaded from disk, and overwrite=False keeps
+            # cache reads on for the warm run.
+            generator.run_or_load(overwrite=False, save=False)
+            if run == "warm_cache" and server.request_count > 0:
+                raise RuntimeError(
+                    f"The warm cache run sent {server.request_count} requests, expected every note to come from the cache."
+                )
+            rows.append(
+                {
+                    "run": run,
+                    "max_concurrency": max_concurrency,
+                    "requests": server.request_count,
+                    **generator.generation_stats,
+                }
+            )
+
+        for max_concurrency in concurrency_levels:
+            run_generation("no_cache", max_concurrency, None)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for run in ["cold_cache", "warm_cache"]:
+                cache = LLMResponseCache(cache_dir)
+                run_generation(run, max(concurrency_levels), cache)
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    return results
+
+
+def benchmark_extraction(
+    data: List[str],
+    entity_list: List[str],
+    prompt_template: str,
+    responses: Optional[Union[Dict[str, str], Callable[[str], str]]] = None,
+    default_response: str = "[]",
+    latency: float = 0.05,
+    multi_entity_prompt: bool = False,
+    worker_counts: List[int] = [1],
+) -> pd.DataFrame:
+    """Benchmarks the ollama extraction path end to end against a local MockOllamaServer,
+    so no model, network or GPU is needed.
+
+    Throughput is measured for each number of worker processes without a cache, then a
+    single process is run twice with an empty response cache to measure a cold and a warm
+    cache. The cache lives in a temporary folder.
+
+    Args:
+        data (List[str]): Medical notes to extract entities from.
+        entity_list (List[str]): This is a list of entity names given to the model.
+        prompt_template (str): Extraction prompt template, a multi-entity template if multi_entity_prompt is set.
+        responses (Optional[Union[Dict[str, str], Callable[[str], str]]], optional): Canned responses of the mock
+                                                                                     server, see MockOllamaServer.
+                                                                                     Defaults to None.
+        default_response (str, optional): Response to prompts with no canned response, "{}" suits a multi-entity
+                                          prompt. Defaults to "[]".
+        latency (float, optional): Seconds the mock server waits per request. Defaults to 0.05.
+        multi_entity_prompt (bool, optional): Ask for every entity in one request. Defaults to False.
+        worker_counts (List[int], optional): Numbers of worker processes to try. Defaults to [1].
+
+    Returns:
+        pd.DataFrame: Notes per second, requests sent and cache hit rate of each run.
+    """
+    rows = []
+    with MockOllamaServer(
+        responses, default_response=default_response, latency=latency
+    ) as server:
+
+        def run_extraction(
+            run: str, n_workers: int, cache: Optional[LLMResponseCache]
+        ) -> None:
+            server.reset_stats()
+            start = time.perf_counter()
+            create_patients_entities(
+                data,
+                entity_list,
+                "ollama",
+                prompt_template,
+                ollama_ner_model="mock",
+                ollama_base_url=server.base_url,
+                verbose=False,
+                llm_cache=cache,
+                multi_entity_prompt=multi_entity_prompt,
+                n_workers=n_workers,
+            )
+            elapsed = time.perf_counter() - start
+            row = {
+                "run": run,
+                "workers": n_workers,
+                "requests": server.request_count,
+                "notes_per_sec": len(data) / max(elapsed, 1e-9),
+            }
+            if cache is not None:
+                row["cache_hit_rate"] = cache.hit_rate()
+            rows.append(row)
+
+        for n_workers in worker_counts:
+            run_extraction("no_cache", n_workers, None)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for run in ["cold_cache", "warm_cache"]:
+                cache = LLMResponseCache(cache_dir)
+                run_extraction(run, 1, cache)
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    return results
@@ -0,0 +1,183 @@
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Union
+
+
+class MockOllamaServer:
+    """
+    Local stand-in for an Ollama server, so the ollama generation and extraction paths can
+    be benchmarked without a live model, network or GPU.
+
+    It answers POST /api/generate the way Ollama does: the response is streamed as JSON lines
+    with a "response" chunk each, followed by a final line with "done" set to true. Each
+    request waits latency seconds, plus latency_per_chunk seconds per streamed chunk, before
+    it is answered. Requests are served on separate threads, so concurrent requests overlap
+    like they do against a real server with parallel slots.
+
+    Usage:
+        with MockOllamaServer(default_response="[]", latency=0.05) as server:
+            llm = Ollama(model="mock", base_url=server.base_url)
+    """
+
+    def __init__(
+        self,
+        responses: Optional[
+            Union[Dict[str, str], Callable[[str], str]]
+        ] = None,
+        default_response: str = "",
+        latency: float = 0.0,
+        latency_per_chunk: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Args:
+            responses (Optional[Union[Dict[str, str], Callable[[str], str]]], optional): Canned responses. Either a
+                function from the prompt to the response, or a dictionary from a substring of the prompt to the
+                response, where the first key found in the prompt is used. Defaults to None.
+            default_response (str, optional): Response to prompts that match no canned response. Defaults to "".
+            latency (float, optional): Seconds each request waits before it is answered. Defaults to 0.0.
+            latency_per_chunk (float, optional): Extra seconds waited per streamed chunk of the response. Defaults to 0.0.
+            host (str, optional): Host the server listens on. Defaults to "127.0.0.1".
+            port (int, optional): Port the server listens on, 0 picks a free port. Defaults to 0.
+        """
+        self.responses = responses
+        self.default_response = default_response
+        self.latency = latency
+        self.latency_per_chunk = latency_per_chunk
+        self.request_count = 0
+        self.prompts = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """URL to pass as base_url to the langchain Ollama LLM."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOllamaServer":
+        """Starts serving requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and frees its port."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockOllamaServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        """Resets the request count and the recorded prompts."""
+        with self._lock:
+            self.request_count = 0
+            self.prompts = []
+
+    def respond(self, prompt: str) -> str:
+        """Returns the canned response to a prompt.
+
+        Args:
+            prompt (str): The prompt sent to the server.
+
+        Returns:
+            str: The response to stream back.
+        """
+        if callable(self.responses):
+            return self.responses(prompt)
+        for key, response in (self.responses or dict()).items():
+            if key in prompt:
+                return response
+        return self.default_response
+
+    def _make_handler(self):
+        server = self
+
+        class MockOllamaHandler(BaseHTTPRequestHandler):
+            # Chunked transfer encoding needs HTTP/1.1.
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/api/generate":
+                    self._send_json(404, {"error": f"{self.path} not found"})
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                prompt = request.get("prompt", "")
+                with server._lock:
+                    server.request_count += 1
+                    server.prompts.append(prompt)
+
+                response = server.respond(prompt)
+                # Stream the response a word at a time, like tokens from a model.
+                chunks = [word + " " for word in response.split(" ")[:-1]] + [
+                    response.split(" ")[-1]
+                ]
+                time.sleep(
+                    server.latency + server.latency_per_chunk * len(chunks)
+                )
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                model = request.get("model", "mock")
+                for chunk in chunks:
+                    self._write_chunk(
+                        {
+                            "model": model,
+                            "created_at": _now(),
+                            "response": chunk,
+                            "done": False,
+                        }
+                    )
+                self._write_chunk(
+                    {
+                        "model": model,
+                        "created_at": _now(),
+                        "response": "",
+                        "done": True,
+                        "eval_count": len(chunks),
+                    }
+                )
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, data: Dict) -> None:
+                line = (json.dumps(data) + "\n").encode()
+                self.wfile.write(
+                    f"{len(line):x}\r\n".encode() + line + b"\r\n"
+                )
+
+            def _send_json(self, status: int, data: Dict) -> None:
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                # Keep benchmark output clean of per-request access logs.
+                pass
+
+        return MockOllamaHandler
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,104 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List
+
+from src.privacy_risk_scorer.privacy_risk_scorer import PrivacyRiskScorer
+
+
+def benchmark_predict_transformed(
+    scorer: PrivacyRiskScorer,
+    transformed_df: pd.DataFrame,
+    repeats: int = 3,
+) -> Dict[str, Any]:
+    """Times the per-row and batched scoring paths of a fitted PrivacyRiskScorer
+    on the same transformed records and checks that both give the same scores.
+
+    Args:
+        scorer (PrivacyRiskScorer): A scorer that has already been fitted.
+        transformed_df (pd.DataFrame): Records transformed with `map_records_to_copula`.
+        repeats (int, optional): Number of timed runs per path, the fastest is kept. Defaults to 3.
+
+    Returns:
+        Dict[str, Any]: Rows per second for each path, the speed up of the batched path
+                        and whether the two paths returned identical scores.
+    """
+    n_rows = transformed_df.shape[0]
+    results = {"n_rows": n_rows}
+    scores = {}
+
+    for name, batched in [("per_row", False), ("batched", True)]:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            scores[name] = scorer.predict_transformed(
+                transformed_df, batched=batched, use_cache=False
+            )
+            timings.append(time.perf_counter() - start)
+        results[f"{name}_rows_per_sec"] = n_rows / min(timings)
+
+    results["speed_up"] = (
+        results["batched_rows_per_sec"] / results["per_row_rows_per_sec"]
+    )
+    results["identical"] = bool(
+        np.array_equal(scores["per_row"], scores["batched"])
+    )
+
+    for key, value in results.items():
+        print(f"{key}: {value}")
+
+    return results
+
+
+def benchmark_scoring_workers(
+    scorer: PrivacyRiskScorer,
+    transformed_df: pd.DataFrame,
+    worker_counts: List[int] = [1, 2, 4, 8],
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """Times batched scoring of the same transformed records with different numbers
+    of scoring workers, to show how throughput scales with the Julia threads available.
+
+    Args:
+        scorer (PrivacyRiskScorer): A scorer that has already been fitted.
+        transformed_df (pd.DataFrame): Records transformed with `map_records_to_copula`.
+        worker_counts (List[int], optional): Numbers of workers to try. Defaults to [1, 2, 4, 8].
+        repeats (int, optional): Number of timed runs per worker count, the fastest is kept. Defaults to 3.
+
+    Returns:
+        pd.DataFrame: Rows per second and speed up over one worker, for each worker count.
+    """
+    n_rows = transformed_df.shape[0]
+    original_workers = scorer.scoring_workers
+    reference = None
+    rows = []
+
+    try:
+        for n_workers in worker_counts:
+            scorer.scoring_workers = n_workers
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                scores = scorer.predict_transformed(
+                    transformed_df, batched=True, use_cache=False
+                )
+                timings.append(time.perf_counter() - start)
+            if reference is None:
+                reference = scores
+            rows.append(
+                {
+                    "workers": n_workers,
+                    "rows_per_sec": n_rows / min(timings),
+                    "identical": bool(np.array_equal(reference, scores)),
+                }
+            )
+    finally:
+        scorer.scoring_workers = original_workers
+
+    results = pd.DataFrame(rows)
+    results["speed_up"] = (
+        results["rows_per_sec"] / results["rows_per_sec"].iloc[0]
+    )
+    print(f"Julia threads available: {scorer.runtime.n_threads}")
+    print(results.to_string(index=False))
+    return results
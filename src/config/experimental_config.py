@@ -11,16 +11,20 @@ class LocalFeaturesConfig(BaseModel):
 
 class GlinerFeaturesConfig(BaseModel):
     gliner_model: Optional[str] = None
+    batch_size: int = 8
+    num_threads: Optional[int] = None
 
 
 class OllamaFeaturesConfig(BaseModel):
     ollama_ner_model: Optional[str] = None
     prompt_template_path: Optional[str] = None
+    base_url: str = "http://localhost:11434"
 
 
 class GenerateModelFeaturesConfig(BaseModel):
     llm_model_name: str
     prompt_template_path: str
+    base_url: str = "http://localhost:11434"
 
 
 class ExtractionConfig(BaseModel):
@@ -29,12 +33,18 @@ class ExtractionConfig(BaseModel):
     local_features: Optional[LocalFeaturesConfig]
     ollama_features: Optional[OllamaFeaturesConfig]
     entity_list: Optional[List] = None
+    multi_entity_prompt: bool = False
+    n_workers: int = 1
+    chunk_size: Optional[int] = None
+    chunk_overlap: int = 200
     llm_path: Optional[str] = None
     path_output: Optional[str] = None
 
 
 class GenerateConfig(BaseModel):
     llm_model_features: GenerateModelFeaturesConfig
+    max_concurrency: int = 4
+    request_timeout: Optional[float] = None
     synthea_path: Optional[str] = None
     path_output: Optional[str] = None
 
@@ -52,10 +62,18 @@ class OutputsConfig(BaseModel):
 
 class Pycorrectmatch(BaseModel):
     privacy_scorer: bool
+    batch_scoring: bool = True
+    score_cache: bool = True
+    copula_cache_dir: Optional[str] = None
+    scoring_workers: int = 1
+    julia_threads: Optional[int] = None
+    julia_sysimage_path: Optional[str] = None
+    build_sysimage: bool = False
 
 
 class Explainers(BaseModel):
     shap: bool
+    exact_shapley: bool = False
 
 
 class PyCanon(BaseModel):
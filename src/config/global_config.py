@@ -1,6 +1,7 @@
 import yaml
 
 from pydantic import BaseModel
+from typing import Optional
 
 
 class OutputSettings(BaseModel):
@@ -17,9 +18,15 @@ class SyntheaSettings(BaseModel):
     path_synthea: str
 
 
+class LLMCacheSettings(BaseModel):
+    cache_dir: str
+    max_size_mb: float = 1024
+
+
 class GlobalConfig(BaseModel):
     output_paths: OutputSettings
     synthea: SyntheaSettings
+    llm_cache: Optional[LLMCacheSettings] = None
 
 
 def load_global_config(
@@ -60,6 +60,28 @@ def load_and_validate_extraction_prompt_template(
     )
 
 
+def load_and_validate_multi_entity_extraction_prompt_template(
+    filename: str,
+) -> Dict[str, str]:
+    """
+    Loads and validates a multi-entity extraction prompt template from a JSON file.
+    The template asks for every entity in one prompt, so it takes the list of
+    entity names instead of a single entity name.
+
+    Args:
+        filename (str): The file path of the JSON file.
+
+    Returns:
+        dict: The loaded template.
+
+    Raises:
+        PromptTemplateError: If required placeholders are missing in the template.
+    """
+    return load_and_validate_prompt_template(
+        filename, ["input_text", "entity_names"]
+    )
+
+
 def load_and_validate_generate_prompt_template(
     filename: str,
 ) -> Dict[str, str]:
@@ -125,6 +147,20 @@ def save_extraction_template_to_json(template_str: str, file_path: str):
     save_template_to_json(template_str, file_path, required_placeholders)
 
 
+def save_multi_entity_extraction_template_to_json(
+    template_str: str, file_path: str
+):
+    """
+    Saves the provided multi-entity extraction template string to a JSON file.
+
+    Args:
+        template_str (str): The multi-entity extraction template string to be saved.
+        file_path (str): The file path where the JSON file will be saved.
+    """
+    required_placeholders = ["input_text", "entity_names"]
+    save_template_to_json(template_str, file_path, required_placeholders)
+
+
 def save_generate_template_to_json(template_str: str, file_path: str):
     """
     Saves the provided generate template string to a JSON file.
@@ -0,0 +1,218 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+WHITESPACE = [" ", "\n", "\t"]
+
+
+def split_into_windows(
+    text: str, chunk_size: int, chunk_overlap: int = 0
+) -> List[Tuple[int, str]]:
+    """Splits a note into overlapping windows of at most chunk_size characters.
+
+    Windows end on whitespace where possible, so that words are not cut in two, and each
+    window starts chunk_overlap characters before the end of the previous one. An entity that
+    is cut at the edge of one window is then found whole in the next one, as long as it is
+    shorter than the overlap.
+
+    Args:
+        text (str): The note to split.
+        chunk_size (int): Maximum number of characters in a window.
+        chunk_overlap (int, optional): Number of characters shared by neighbouring windows. Defaults to 0.
+
+    Raises:
+        ValueError: If chunk_overlap is not smaller than chunk_size.
+
+    Returns:
+        List[Tuple[int, str]]: The offset of each window in the note and the text of the window.
+    """
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError(
+            f"chunk_overlap must be between 0 and chunk_size ({chunk_size}), got {chunk_overlap}."
+        )
+
+    windows = []
+    start = 0
+    while True:
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Step back to the last whitespace, as long as the window still moves forward.
+            space = max(
+                text.rfind(separator, start + chunk_overlap + 1, end)
+                for separator in WHITESPACE
+            )
+            if space != -1:
+                end = space
+        windows.append((start, text[start:end]))
+        if end >= len(text):
+            return windows
+
+        next_start = end - chunk_overlap
+        # Start the next window at the beginning of a word.
+        spaces = [
+            space
+            for space in (
+                text.find(separator, next_start, end)
+                for separator in WHITESPACE
+            )
+            if space != -1
+        ]
+        start = min(spaces) + 1 if spaces else next_start
+
+
+def rebase_entities(
+    entities: List[Dict[str, Any]], offset: int
+) -> List[Dict[str, Any]]:
+    """Shifts the start and end of entities found in a window to offsets in the whole note.
+
+    Args:
+        entities (List[Dict[str, Any]]): Entities found in a window.
+        offset (int): Offset of the window in the note.
+
+    Returns:
+        List[Dict[str, Any]]: Copies of the entities with start and end shifted by offset.
+    """
+    return [
+        {
+            **entity,
+            "start": entity["start"] + offset,
+            "end": entity["end"] + offset,
+        }
+        for entity in entities
+    ]
+
+
+def spans_overlap(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    """Checks whether two entities have the same label and overlapping spans."""
+    if first["label"] != second["label"]:
+        return False
+    if (first["start"], first["end"]) == (second["start"], second["end"]):
+        return True
+    return first["start"] < second["end"] and second["start"] < first["end"]
+
+
+def merge_window_entities(
+    windows: List[Tuple[int, str]],
+    window_entities: List[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Merges the entities found in the windows of one note into entities of the whole note.
+
+    Entities are rebased to note offsets. Only pairs of entities with the same label that come
+    from different windows and lie in the text shared by those windows are de-duplicated:
+        - an entity with the same span as one from an earlier window is dropped,
+        - an entity cut at the end of an earlier window is replaced by the longer entity
+          found in the next window, and the reverse for an entity cut at the start of a window.
+    Each earlier entity is matched at most once, so repeated matches are kept as often as in a
+    single window. Entities within one window are never merged, and a note with a single window
+    is passed through unchanged.
+
+    Args:
+        windows (List[Tuple[int, str]]): The windows of the note, from split_into_windows.
+        window_entities (List[List[Dict[str, Any]]]): Entities found in each window.
+
+    Returns:
+        List[Dict[str, Any]]: The entities of the note.
+    """
+    if len(windows) == 1:
+        return rebase_entities(window_entities[0], windows[0][0])
+
+    merged = []
+    for i, ((offset, _), entities) in enumerate(zip(windows, window_entities)):
+        for entity in rebase_entities(entities, offset):
+            match = find_window_duplicate(merged, windows, i, entity)
+            if match is None:
+                merged.append(
+                    {"entity": entity, "window": i, "matched": False}
+                )
+                continue
+
+            match["matched"] = True
+            other = match["entity"]
+            window_end = windows[match["window"]][0] + len(
+                windows[match["window"]][1]
+            )
+            if other["end"] == window_end and span_length(
+                entity
+            ) > span_length(other):
+                match["entity"] = entity
+                match["window"] = i
+
+    return [kept["entity"] for kept in merged]
+
+
+def find_window_duplicate(
+    merged: List[Dict[str, Any]],
+    windows: List[Tuple[int, str]],
+    window: int,
+    entity: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Finds the entity from an earlier window that an entity of this window duplicates, see merge_window_entities.
+
+    Args:
+        merged (List[Dict[str, Any]]): Entities kept so far, with the window they came from.
+        windows (List[Tuple[int, str]]): The windows of the note.
+        window (int): The window the entity was found in.
+        entity (Dict[str, Any]): The entity, rebased to note offsets.
+
+    Returns:
+        Optional[Dict[str, Any]]: The kept entry that the entity duplicates, or None.
+    """
+    window_start = windows[window][0]
+    for kept in merged:
+        other = kept["entity"]
+        if (
+            kept["window"] == window
+            or kept["matched"]
+            or not spans_overlap(other, entity)
+        ):
+            continue
+
+        # Text shared by the earlier window and this window.
+        shared_end = windows[kept["window"]][0] + len(
+            windows[kept["window"]][1]
+        )
+        if not all(
+            span["start"] < shared_end
+            and span["end"] > window_start
+            or span["start"] == span["end"] == window_start
+            for span in [other, entity]
+        ):
+            continue
+
+        if (other["start"], other["end"]) == (entity["start"], entity["end"]):
+            return kept
+        if other["end"] == shared_end and span_length(entity) > span_length(
+            other
+        ):
+            return kept
+        if entity["start"] == window_start and span_length(
+            other
+        ) > span_length(entity):
+            return kept
+    return None
+
+
+def span_length(entity: Dict[str, Any]) -> int:
+    """Number of characters covered by an entity."""
+    return entity["end"] - entity["start"]
+
+
+def split_notes_into_windows(
+    data: List[str], chunk_size: int, chunk_overlap: int = 0
+) -> Tuple[List[str], List[List[Tuple[int, str]]]]:
+    """Splits every note into windows, returning the windows of all notes in one flat list
+    so they can be passed to the model in batches.
+
+    Args:
+        data (List[str]): This is a list of llm generated medical notes.
+        chunk_size (int): Maximum number of characters in a window.
+        chunk_overlap (int, optional): Number of characters shared by neighbouring windows. Defaults to 0.
+
+    Returns:
+        Tuple[List[str], List[List[Tuple[int, str]]]]: The text of every window, and the windows of each note.
+    """
+    note_windows = [
+        split_into_windows(text, chunk_size, chunk_overlap) for text in data
+    ]
+    window_texts = [
+        window_text for windows in note_windows for _, window_text in windows
+    ]
+    return window_texts, note_windows
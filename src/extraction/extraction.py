@@ -1,6 +1,13 @@
 import json
 import re
 import os
+import time
+import itertools
+import multiprocessing
+import torch
+import ahocorasick
+
+from concurrent.futures import ProcessPoolExecutor
 
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
@@ -12,6 +19,7 @@ from gliner import GLiNER
 from src.config.experimental_config import ExtractionConfig
 from src.config.prompt_template_handler import (
     load_and_validate_extraction_prompt_template,
+    load_and_validate_multi_entity_extraction_prompt_template,
 )
 from src.utils import (
     load_json_from_path_or_variable,
@@ -19,8 +27,19 @@ from src.utils import (
     load_json,
     download_llm_model_from_hf,
     file_exists,
+    get_jsonl_path,
+    append_jsonl,
+    iter_jsonl,
+    repair_jsonl,
+    iter_batches,
 )
 from src.config.global_config import GlobalConfig
+from src.llm_cache import LLMResponseCache, load_llm_cache, cached_llm_call
+from src.extraction.model_registry import model_registry
+from src.extraction.chunking import (
+    split_notes_into_windows,
+    merge_window_entities,
+)
 
 
 class Extraction:
@@ -41,9 +60,15 @@ class Extraction:
             extractionconfig (ExtractionConfig): This is a pydantic typing configuration that contains values on:
                 - server_model_type: The type of way you want to serve the model e.g. ollama, local, or gliner.
                 - local features: Contains two features from huggingface (hf_repo_id and hf_filename.)
-                - ollama_features: Contain one feature which is the ollama_ner_model.
+                - ollama_features: Contains the ollama_ner_model and the base_url of the Ollama server.
                 - prompt_template_path: Path to where the template lives.
                 - entity_list: List of entities you want to extract from the model.
+                - n_workers: Number of worker processes the notes are split across.
+                - chunk_size: Maximum number of characters passed to the model at once, longer notes
+                              are split into overlapping windows. None passes whole notes.
+                - chunk_overlap: Number of characters shared by neighbouring windows.
+                - multi_entity_prompt: Ask a generative model for every entity in one prompt, using a template
+                                       with {entity_names} instead of {entity_name}.
                 - llm_path: Path to where the LLM has been saved.
                 - path_output: Path where we want to save the data output from this component.
             llm_input (Optional[List[str]], optional): This is a list of llm generated medical notes. Defaults to None.
@@ -55,7 +80,13 @@ class Extraction:
         self.path_output = extractionconfig.path_output
         self.server_model_type = extractionconfig.server_model_type
         self.entity_list = extractionconfig.entity_list
+        self.n_workers = extractionconfig.n_workers
+        self.chunk_size = extractionconfig.chunk_size
+        self.chunk_overlap = extractionconfig.chunk_overlap
+        self.multi_entity_prompt = extractionconfig.multi_entity_prompt
         self.gliner_model = extractionconfig.gliner_features.gliner_model
+        self.gliner_batch_size = extractionconfig.gliner_features.batch_size
+        self.gliner_num_threads = extractionconfig.gliner_features.num_threads
 
         self.hf_repo_id = extractionconfig.local_features.hf_repo_id
         self.hf_filename = extractionconfig.local_features.hf_filename
@@ -63,20 +94,26 @@ class Extraction:
         self.ollama_ner_model = (
             extractionconfig.ollama_features.ollama_ner_model
         )
+        self.ollama_base_url = extractionconfig.ollama_features.base_url
+
+        if self.multi_entity_prompt:
+            load_template = (
+                load_and_validate_multi_entity_extraction_prompt_template
+            )
+        else:
+            load_template = load_and_validate_extraction_prompt_template
 
         if self.server_model_type == "ollama":
             template_path = f"{global_config.output_paths.extraction_template}/{extractionconfig.ollama_features.prompt_template_path}"
-            self.prompt_template = (
-                load_and_validate_extraction_prompt_template(template_path)
-            )
+            self.prompt_template = load_template(template_path)
         elif self.server_model_type == "local":
             template_path = f"{global_config.output_paths.extraction_template}/{extractionconfig.local_features.prompt_template_path}"
-            self.prompt_template = (
-                load_and_validate_extraction_prompt_template(template_path)
-            )
+            self.prompt_template = load_template(template_path)
         else:
             self.prompt_template = None
 
+        self.llm_cache = load_llm_cache(global_config)
+
     def run_or_load(
         self,
         verbose: bool = False,
@@ -86,9 +123,15 @@ class Extraction:
         """This returns a list of dictionaries that has an 'Entities' property of a
         list of entity dictionaries for each person.
 
+        While extracting, each patient's record is appended to a JSONL file next to
+        path_output as soon as it is produced. If a run is interrupted, the next run
+        resumes from the number of records already in the JSONL file.
+
         Args:
             verbose (bool): Determines whether a model ran using langchain is verbose to the user. Defaults to False.
-            overwrite (bool): Determines whether you want to overwrite the data on another run. Defaults to True.
+            overwrite (bool): Determines whether you want to overwrite the data on another run. This also skips reading the
+                              LLM cache, so entities are extracted again, while new responses are still written to it.
+                              Defaults to True.
             save (bool): Determines whether you want to save any files, if this is false it doesn't save any files. Defaults to True.
 
         Returns:
@@ -103,17 +146,48 @@ class Extraction:
                 self.llm_input, self.llm_path
             )
 
-            patients_entities = create_patients_entities(
-                data,
-                self.entity_list,
-                self.server_model_type,
-                self.prompt_template,
-                gliner_model=self.gliner_model,
-                local_hf_filename=self.hf_filename,
-                local_hf_repo_id=self.hf_repo_id,
-                ollama_ner_model=self.ollama_ner_model,
-                verbose=verbose,
-            )
+            if self.llm_cache is not None:
+                self.llm_cache.refresh = overwrite
+
+            stream_path = None
+            patients_entities = []
+            if save and self.path_output is not None:
+                stream_path = get_jsonl_path(self.path_output)
+                if overwrite and file_exists(stream_path):
+                    os.remove(stream_path)
+                n_done = repair_jsonl(stream_path)
+                if n_done > 0:
+                    patients_entities = list(iter_jsonl(stream_path))
+                    print(
+                        f"Resuming from {stream_path}: {n_done} notes done, {len(data) - n_done} to extract."
+                    )
+
+            def stream_patient(patient_entities: Dict[str, Any]) -> None:
+                patients_entities.append(patient_entities)
+                if stream_path is not None:
+                    append_jsonl(patient_entities, stream_path)
+
+            if len(patients_entities) < len(data):
+                create_patients_entities(
+                    data[len(patients_entities) :],
+                    self.entity_list,
+                    self.server_model_type,
+                    self.prompt_template,
+                    gliner_model=self.gliner_model,
+                    gliner_batch_size=self.gliner_batch_size,
+                    gliner_num_threads=self.gliner_num_threads,
+                    local_hf_filename=self.hf_filename,
+                    local_hf_repo_id=self.hf_repo_id,
+                    ollama_ner_model=self.ollama_ner_model,
+                    ollama_base_url=self.ollama_base_url,
+                    verbose=verbose,
+                    llm_cache=self.llm_cache,
+                    multi_entity_prompt=self.multi_entity_prompt,
+                    n_workers=self.n_workers,
+                    chunk_size=self.chunk_size,
+                    chunk_overlap=self.chunk_overlap,
+                    on_patient=stream_patient,
+                )
 
             if save:
                 if overwrite or not file_exists(self.path_output):
@@ -139,6 +213,46 @@ def find_string_matches(text: str, entity_string: str) -> List[Tuple]:
     return indices
 
 
+def find_all_string_matches(
+    text: str, entity_strings: List[str]
+) -> Dict[str, List[Tuple[int, int]]]:
+    """Locates every extracted string in the text in a single pass with an Aho-Corasick automaton.
+
+    The matches of each string are the same as find_string_matches would return: the
+    non-overlapping occurrences of that string from left to right. Occurrences of
+    different strings can overlap each other.
+
+    Args:
+        text (str): Total string that entities have been extracted from.
+        entity_strings (List[str]): The entity values that have been extracted, duplicates are allowed.
+
+    Returns:
+        Dict[str, List[Tuple[int, int]]]: The start and end indexes of each occurrence, for each unique entity string.
+    """
+    matches = {entity_string: [] for entity_string in entity_strings}
+
+    automaton = ahocorasick.Automaton()
+    for entity_string in matches:
+        if entity_string:
+            automaton.add_word(entity_string, entity_string)
+
+    if len(automaton) > 0:
+        automaton.make_automaton()
+        last_end = dict()
+        for end_index, entity_string in automaton.iter(text):
+            start = end_index - len(entity_string) + 1
+            # Like re.finditer, skip occurrences overlapping the previous match of the same string.
+            if start >= last_end.get(entity_string, 0):
+                matches[entity_string].append((start, end_index + 1))
+                last_end[entity_string] = end_index + 1
+
+    # An empty pattern matches at every position, as it does with re.finditer.
+    if "" in matches:
+        matches[""] = [(i, i) for i in range(len(text) + 1)]
+
+    return matches
+
+
 def load_local_ner_model(
     local_ner_path: str, verbose: bool = True
 ) -> LlamaCpp:
@@ -167,11 +281,14 @@ def load_local_ner_model(
 
 
 def load_ollama_ner_model(
-    ollama_ner_model: str, verbose: bool = True
+    ollama_ner_model: str,
+    verbose: bool = True,
+    base_url: str = "http://localhost:11434",
 ) -> Ollama:
     """
     Args:
         ollama_ner_model: The name of an ollama model that can be pulled from ollama.
+        base_url: URL of the Ollama server.
 
     Returns:
         Ollama: Returns a llamacpp object to run universal NER locally.
@@ -181,7 +298,11 @@ def load_ollama_ner_model(
     if verbose:
         callback_manager.add_handler(StreamingStdOutCallbackHandler())
 
-    llm = Ollama(model=ollama_ner_model, callback_manager=callback_manager)
+    llm = Ollama(
+        model=ollama_ner_model,
+        base_url=base_url,
+        callback_manager=callback_manager,
+    )
 
     return llm
 
@@ -191,6 +312,7 @@ def get_entity_from_generative_ner_model(
     entity_name: str,
     llm: Union[LlamaCpp, Ollama],
     prompt_template: PromptTemplate = None,
+    llm_cache: Optional[LLMResponseCache] = None,
 ) -> List[Any]:
     """
     Uses the LLamaCpp OR Ollama to extract entities, for a given entity name, from the input text provided.
@@ -199,6 +321,7 @@ def get_entity_from_generative_ner_model(
         input_text (str): This is a llm generated medical record.
         entity_name (str): This is the name of the entity given to universal NER to help extrct.
         llm (Union[LlamaCpp, Ollama]): This returns a configured LlamaCpp or Ollama pipeline to run a generative NER model.
+        llm_cache (Optional[LLMResponseCache], optional): Response cache checked before calling the model. Defaults to None.
 
     Returns:
         List[Any]: Returns a list of entities that have been extracted with the given entity_name.
@@ -209,12 +332,67 @@ def get_entity_from_generative_ner_model(
         {"input_text": input_text, "entity_name": entity_name}
     )
 
-    output = llm(prompt)
+    output = cached_llm_call(llm, prompt, llm_cache)
     output = json.loads(output)
 
     return output
 
 
+def get_entities_from_generative_ner_model(
+    input_text: str,
+    entity_list: List[str],
+    llm: Union[LlamaCpp, Ollama],
+    prompt_template: PromptTemplate = None,
+    llm_cache: Optional[LLMResponseCache] = None,
+) -> Dict[str, List[Any]]:
+    """
+    Uses the LLamaCpp OR Ollama to extract every entity in entity_list from the input text with a single prompt.
+
+    Args:
+        input_text (str): This is a llm generated medical record.
+        entity_list (List[str]): The names of the entities to extract.
+        llm (Union[LlamaCpp, Ollama]): This returns a configured LlamaCpp or Ollama pipeline to run a generative NER model.
+        prompt_template (PromptTemplate): A multi-entity template with {input_text} and {entity_names} placeholders.
+        llm_cache (Optional[LLMResponseCache], optional): Response cache checked before calling the model. Defaults to None.
+
+    Raises:
+        ValueError: If the model does not answer with a JSON object, or an entity's value is not a string
+                    or a list of strings.
+
+    Returns:
+        Dict[str, List[Any]]: The extracted values for each entity name, entities the model left out map to an empty list.
+    """
+    input_text = input_text.strip()
+
+    prompt = prompt_template.format_map(
+        {"input_text": input_text, "entity_names": json.dumps(entity_list)}
+    )
+
+    output = cached_llm_call(llm, prompt, llm_cache)
+    output = json.loads(output)
+
+    if not isinstance(output, dict):
+        raise ValueError(
+            f"Expected a JSON object with one key per entity, got: {output}"
+        )
+
+    outputs_per_entity = dict()
+    for entity in entity_list:
+        values = output.get(entity, [])
+        # A single value is often answered as a string rather than a one item list.
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not all(
+            isinstance(value, str) for value in values
+        ):
+            raise ValueError(
+                f"Expected a list of strings for '{entity}', got: {output[entity]}"
+            )
+        outputs_per_entity[entity] = values
+
+    return outputs_per_entity
+
+
 def create_entity_output(
     output: List[str], entity: str, match_indices: List[Tuple[int]]
 ) -> List[Dict[str, Any]]:
@@ -248,6 +426,8 @@ def create_patient_entities_from_generative_llm(
     input_text: str,
     entity_list: List[str],
     prompt_template: str,
+    llm_cache: Optional[LLMResponseCache] = None,
+    multi_entity_prompt: bool = False,
 ) -> List[Dict[str, Any]]:
     """Function used to create entities from a generative LLM that produces a list of entity outputs.
 
@@ -256,17 +436,37 @@ def create_patient_entities_from_generative_llm(
         input_text (str): The document fed into the model.
         entity_list (List[str]): The list of entities you want to get out of the model.
         prompt_template (PromptTemplate): This is a prompt that is fed to the ollama or LlamaCPP pipeline.
+        llm_cache (Optional[LLMResponseCache], optional): Response cache checked before calling the model. Defaults to None.
+        multi_entity_prompt (bool, optional): Ask for every entity in one call instead of one call per entity. Defaults to False.
 
     Returns:
         List[Dict[str, Any]]: Returns a list of entity dictionaries extracted out of the model.
     """
+    if multi_entity_prompt:
+        outputs_per_entity = get_entities_from_generative_ner_model(
+            input_text, entity_list, model, prompt_template, llm_cache
+        )
+    else:
+        outputs_per_entity = {
+            entity: get_entity_from_generative_ner_model(
+                input_text, entity, model, prompt_template, llm_cache
+            )
+            for entity in entity_list
+        }
+
+    all_matches = find_all_string_matches(
+        input_text,
+        [
+            output
+            for entity in entity_list
+            for output in outputs_per_entity[entity]
+        ],
+    )
+
     patient_entities = []
     for entity in entity_list:
-        outputs = get_entity_from_generative_ner_model(
-            input_text, entity, model, prompt_template
-        )
-        for output in outputs:
-            match_indices = find_string_matches(input_text, output)
+        for output in outputs_per_entity[entity]:
+            match_indices = all_matches[output]
             each_output = create_entity_output(output, entity, match_indices)
             patient_entities += each_output
     return patient_entities
@@ -278,16 +478,21 @@ def load_ner_model(
     local_hf_repo_id: str = None,
     local_hf_filename: str = None,
     ollama_ner_model: str = None,
+    ollama_base_url: str = "http://localhost:11434",
     verbose: bool = True,
 ) -> Union[LlamaCpp, Ollama, GLiNER]:
     """A function to load a specific type of NER model.
 
+    Loaded models are kept in the process-wide model_registry, keyed by backend and model id,
+    so later calls with the same model return the already loaded model.
+
     Args:
         server_model_type (str): This is the type of way a model is served. Options being "gliner", "local", and "ollama".
         gliner_model (str): This is the name of the gliner model you want to pull in.
         local_hf_repo_id (str, optional): The location of a repo on hugging face that has a .gguf model we want to download. Defaults to None.
         local_hf_filename (str, optional): The name of the filename inside the local_hf_repo_id. Defaults to None.
         ollama_ner_model (str, optional): The ollama model pulled from ollama. Defaults to None.
+        ollama_base_url (str, optional): URL of the Ollama server. Defaults to "http://localhost:11434".
         verbose (bool): define verbose on whether you want to print outputs to the user. Defaults to True.
 
     Raises:
@@ -302,23 +507,38 @@ def load_ner_model(
             raise ValueError(
                 "For 'gliner' model type, 'gliner_model' must be provided."
             )
-        model = GLiNER.from_pretrained(gliner_model)
+        model = model_registry.get_or_load(
+            ("gliner", gliner_model),
+            lambda: GLiNER.from_pretrained(gliner_model),
+        )
     elif server_model_type == "local":
         if local_hf_repo_id is None or local_hf_filename is None:
             raise ValueError(
                 "For 'local' model type, 'local_hf_repo_id' and 'local_hf_filename' must be provided."
             )
-        download_llm_model_from_hf(
-            repo_id=local_hf_repo_id, filename=local_hf_filename
+
+        def load_local_model() -> LlamaCpp:
+            download_llm_model_from_hf(
+                repo_id=local_hf_repo_id, filename=local_hf_filename
+            )
+            local_ner_path = f"../models/{local_hf_filename}"
+            return load_local_ner_model(local_ner_path, verbose)
+
+        model = model_registry.get_or_load(
+            ("local", local_hf_repo_id, local_hf_filename, verbose),
+            load_local_model,
         )
-        local_ner_path = f"../models/{local_hf_filename}"
-        model = load_local_ner_model(local_ner_path, verbose)
     elif server_model_type == "ollama":
         if ollama_ner_model is None:
             raise ValueError(
                 "For 'ollama' model type, 'ollama_ner_model' must be provided."
             )
-        model = load_ollama_ner_model(ollama_ner_model, verbose)
+        model = model_registry.get_or_load(
+            ("ollama", ollama_ner_model, ollama_base_url, verbose),
+            lambda: load_ollama_ner_model(
+                ollama_ner_model, verbose, ollama_base_url
+            ),
+        )
     else:
         raise ValueError(
             "No valid input provided. Please specify 'server_model_type' as 'gliner', 'local', or 'ollama'"
@@ -333,10 +553,19 @@ def create_patients_entities(
     server_model_type: str,
     prompt_template: PromptTemplate = None,
     gliner_model: str = None,
+    gliner_batch_size: int = 8,
+    gliner_num_threads: Optional[int] = None,
     local_hf_repo_id: str = None,
     local_hf_filename: str = None,
     ollama_ner_model: str = None,
+    ollama_base_url: str = "http://localhost:11434",
     verbose: bool = True,
+    llm_cache: Optional[LLMResponseCache] = None,
+    multi_entity_prompt: bool = False,
+    n_workers: int = 1,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = 0,
+    on_patient: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> List[Dict[str, Any]]:
     """This creates the patient entities JSON from the list of llm generated medical notes.
 
@@ -346,37 +575,310 @@ def create_patients_entities(
         server_model_type (str): This is the type of model used. Options being "gliner", "local", and "ollama".
         prompt_template (PromptTemplate): This is the template used in type of models "local" or "ollama"
         gliner_model (str): The name of the gliner model you want to use to extract entities from.
+        gliner_batch_size (int, optional): Number of notes passed to the gliner model at once. Defaults to 8.
+        gliner_num_threads (Optional[int], optional): Number of CPU threads torch uses for the gliner model. Defaults to None.
         local_hf_repo_id (str, optional): The location of a repo on hugging face that has a .gguf model we want to download. Defaults to None.
         local_hf_filename (str, optional): The name of the filename inside the local_hf_repo_id. Defaults to None.
         ollama_ner_model (str, optional): The ollama model pulled from ollama. Defaults to None.
+        ollama_base_url (str, optional): URL of the Ollama server. Defaults to "http://localhost:11434".
         verbose (bool, optional): This determines whether models run using langchain need verbose on or off.
+        llm_cache (Optional[LLMResponseCache], optional): Response cache for the "local" and "ollama" models. Defaults to None.
+        multi_entity_prompt (bool, optional): Ask "local" and "ollama" models for every entity in one call. Defaults to False.
+        n_workers (int, optional): Number of worker processes the notes are split across. Defaults to 1, which runs in this process.
+        chunk_size (Optional[int], optional): Maximum number of characters passed to the model at once. Defaults to None, which passes whole notes.
+        chunk_overlap (int, optional): Number of characters shared by neighbouring windows. Defaults to 0.
+        on_patient (Optional[Callable[[Dict[str, Any]], None]], optional): Called with each patient's record, in the
+                                                                          order of the notes, as soon as it is produced.
+                                                                          Defaults to None.
 
     Returns:
         List[Dict[str, Any]]: This returns a list of a dictionary with an Entities property
                               which is a list of each entity.
     """
-    model = load_ner_model(
-        server_model_type,
-        gliner_model=gliner_model,
-        local_hf_repo_id=local_hf_repo_id,
-        local_hf_filename=local_hf_filename,
-        ollama_ner_model=ollama_ner_model,
-        verbose=verbose,
+    model_kwargs = {
+        "server_model_type": server_model_type,
+        "gliner_model": gliner_model,
+        "local_hf_repo_id": local_hf_repo_id,
+        "local_hf_filename": local_hf_filename,
+        "ollama_ner_model": ollama_ner_model,
+        "ollama_base_url": ollama_base_url,
+        "verbose": verbose,
+    }
+    extract_kwargs = {
+        "entity_list": entity_list,
+        "server_model_type": server_model_type,
+        "prompt_template": prompt_template,
+        "gliner_batch_size": gliner_batch_size,
+        "gliner_num_threads": gliner_num_threads,
+        "llm_cache": llm_cache,
+        "multi_entity_prompt": multi_entity_prompt,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
+
+    if n_workers > 1 and len(data) > 1:
+        return create_patients_entities_sharded(
+            data, n_workers, model_kwargs, extract_kwargs, on_patient
+        )
+
+    model = load_ner_model(**model_kwargs)
+    return extract_patients_entities(
+        model, data, on_patient=on_patient, **extract_kwargs
     )
 
+
+def extract_patients_entities(
+    model: Union[LlamaCpp, Ollama, GLiNER],
+    data: List[str],
+    entity_list: List[str],
+    server_model_type: str,
+    prompt_template: PromptTemplate = None,
+    gliner_batch_size: int = 8,
+    gliner_num_threads: Optional[int] = None,
+    llm_cache: Optional[LLMResponseCache] = None,
+    multi_entity_prompt: bool = False,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = 0,
+    on_patient: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Extracts the entities of every note with a model that has already been loaded.
+
+    If chunk_size is set, notes are split into overlapping windows first. Notes are taken
+    gliner_batch_size at a time: the windows of the group are extracted together, and the
+    entities of each note's windows are merged back into entities of the whole note and passed
+    to on_patient before the next group is started.
+
+    Args:
+        model (Union[LlamaCpp, Ollama, GLiNER]): A model loaded with load_ner_model.
+        data (List[str]): This is a list of llm generated medical notes.
+        entity_list (List[str]): This is a list of entity names given to the model.
+        server_model_type (str): This is the type of model used. Options being "gliner", "local", and "ollama".
+        prompt_template (PromptTemplate): This is the template used in type of models "local" or "ollama"
+        gliner_batch_size (int, optional): Number of notes passed to the gliner model at once. Defaults to 8.
+        gliner_num_threads (Optional[int], optional): Number of CPU threads torch uses for the gliner model. Defaults to None.
+        llm_cache (Optional[LLMResponseCache], optional): Response cache for the "local" and "ollama" models. Defaults to None.
+        multi_entity_prompt (bool, optional): Ask "local" and "ollama" models for every entity in one call. Defaults to False.
+        chunk_size (Optional[int], optional): Maximum number of characters passed to the model at once. Defaults to None, which passes whole notes.
+        chunk_overlap (int, optional): Number of characters shared by neighbouring windows. Defaults to 0.
+        on_patient (Optional[Callable[[Dict[str, Any]], None]], optional): Called with each patient's record as soon
+                                                                          as it is produced. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: This returns a list of a dictionary with an Entities property
+                              which is a list of each entity.
+    """
+    if chunk_size is not None:
+        total_patients_entities = []
+        # Notes are handled a gliner batch at a time, so each group's records are
+        # streamed to on_patient before the next group is extracted.
+        for notes in iter_batches(data, gliner_batch_size):
+            window_texts, note_windows = split_notes_into_windows(
+                notes, chunk_size, chunk_overlap
+            )
+            window_results = iter(
+                extract_patients_entities(
+                    model,
+                    window_texts,
+                    entity_list,
+                    server_model_type,
+                    prompt_template,
+                    gliner_batch_size=gliner_batch_size,
+                    gliner_num_threads=gliner_num_threads,
+                    llm_cache=llm_cache,
+                    multi_entity_prompt=multi_entity_prompt,
+                )
+            )
+            for windows in note_windows:
+                patient_entities = merge_window_entities(
+                    windows,
+                    [next(window_results)["Entities"] for _ in windows],
+                )
+                total_patients_entities.append({"Entities": patient_entities})
+                if on_patient is not None:
+                    on_patient(total_patients_entities[-1])
+        return total_patients_entities
+
+    if server_model_type == "gliner":
+        return create_patients_entities_from_gliner(
+            model,
+            data,
+            entity_list,
+            batch_size=gliner_batch_size,
+            num_threads=gliner_num_threads,
+            on_patient=on_patient,
+        )
+
     total_patients_entities = []
 
     for patient_num in range(len(data)):
         input_text = data[patient_num]
-        if server_model_type == "gliner":
-            patient_entities = model.predict_entities(
-                input_text, entity_list, threshold=0.5
-            )
-        else:
-            patient_entities = create_patient_entities_from_generative_llm(
-                model, input_text, entity_list, prompt_template
-            )
+        patient_entities = create_patient_entities_from_generative_llm(
+            model,
+            input_text,
+            entity_list,
+            prompt_template,
+            llm_cache,
+            multi_entity_prompt,
+        )
 
         total_patients_entities.append({"Entities": patient_entities})
+        if on_patient is not None:
+            on_patient(total_patients_entities[-1])
+
+    return total_patients_entities
+
+
+# The model loaded by each extraction worker process, see init_extraction_worker.
+_worker_model = None
+
+
+def init_extraction_worker(model_kwargs: Dict[str, Any]) -> None:
+    """Loads the NER model once when an extraction worker process starts.
+
+    Args:
+        model_kwargs (Dict[str, Any]): Keyword arguments for load_ner_model.
+    """
+    global _worker_model
+    _worker_model = load_ner_model(**model_kwargs)
+
+
+def extract_shard(
+    shard: List[str], extract_kwargs: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Extracts the entities of one shard of notes inside a worker process.
+
+    Args:
+        shard (List[str]): The notes in this shard.
+        extract_kwargs (Dict[str, Any]): Keyword arguments for extract_patients_entities.
+
+    Returns:
+        List[Dict[str, Any]]: The patient entities of the shard, in the order of the shard.
+    """
+    return extract_patients_entities(_worker_model, shard, **extract_kwargs)
+
+
+def split_into_shards(data: List[Any], n_shards: int) -> List[List[Any]]:
+    """Splits a list into at most n_shards contiguous shards of near equal size.
+
+    Args:
+        data (List[Any]): The list to split.
+        n_shards (int): The number of shards.
+
+    Returns:
+        List[List[Any]]: The shards, which concatenate back to data.
+    """
+    n_shards = max(1, min(n_shards, len(data)))
+    shard_size, remainder = divmod(len(data), n_shards)
+    shards = []
+    start = 0
+    for i in range(n_shards):
+        end = start + shard_size + (1 if i < remainder else 0)
+        shards.append(data[start:end])
+        start = end
+    return shards
+
+
+def create_patients_entities_sharded(
+    data: List[str],
+    n_workers: int,
+    model_kwargs: Dict[str, Any],
+    extract_kwargs: Dict[str, Any],
+    on_patient: Optional[Callable[[Dict[str, Any]], None]] = None,
+    shards_per_worker: int = 4,
+) -> List[Dict[str, Any]]:
+    """Splits the notes into contiguous shards and extracts them across a pool of
+    worker processes. Each worker loads the NER model once and the shards are merged
+    back in the original order of the notes.
+
+    Args:
+        data (List[str]): This is a list of llm generated medical notes.
+        n_workers (int): Number of worker processes.
+        model_kwargs (Dict[str, Any]): Keyword arguments for load_ner_model.
+        extract_kwargs (Dict[str, Any]): Keyword arguments for extract_patients_entities.
+        on_patient (Optional[Callable[[Dict[str, Any]], None]], optional): Called in this process with each patient's record,
+                                                                          in the order of the notes, as soon as its shard is done.
+                                                                          Defaults to None.
+        shards_per_worker (int, optional): Shards created per worker, smaller shards balance the load better. Defaults to 4.
+
+    Returns:
+        List[Dict[str, Any]]: This returns a list of a dictionary with an Entities property
+                              which is a list of each entity.
+    """
+    extract_kwargs = dict(extract_kwargs)
+    if extract_kwargs["gliner_num_threads"] is None:
+        # Share the cores between the workers instead of every worker using all of them.
+        extract_kwargs["gliner_num_threads"] = max(
+            1, (os.cpu_count() or 1) // n_workers
+        )
+
+    shards = split_into_shards(data, n_workers * shards_per_worker)
+
+    # Spawned workers avoid forking a process that already holds torch or llama.cpp state.
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_extraction_worker,
+        initargs=(model_kwargs,),
+    ) as executor:
+        shard_results = executor.map(
+            extract_shard, shards, itertools.repeat(extract_kwargs)
+        )
+        total_patients_entities = []
+        for shard_result in shard_results:
+            for patient_entities in shard_result:
+                total_patients_entities.append(patient_entities)
+                if on_patient is not None:
+                    on_patient(patient_entities)
+        return total_patients_entities
+
+
+def create_patients_entities_from_gliner(
+    model: GLiNER,
+    data: List[str],
+    entity_list: List[str],
+    batch_size: int = 8,
+    num_threads: Optional[int] = None,
+    on_patient: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Extracts entities from the medical notes with a gliner model, passing batch_size
+    notes to the model at once and logging the throughput of each batch.
+
+    Args:
+        model (GLiNER): A loaded gliner model.
+        data (List[str]): This is a list of llm generated medical notes.
+        entity_list (List[str]): This is a list of entity names given to the model.
+        batch_size (int, optional): Number of notes passed to the model at once. Defaults to 8.
+        num_threads (Optional[int], optional): Number of CPU threads torch uses. Defaults to None, which keeps the torch default.
+        on_patient (Optional[Callable[[Dict[str, Any]], None]], optional): Called with each patient's record as soon
+                                                                          as its batch is done. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: This returns a list of a dictionary with an Entities property
+                              which is a list of each entity.
+    """
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+
+    total_patients_entities = []
+    n_batches = (len(data) + batch_size - 1) // batch_size
+
+    for batch_num, start in enumerate(range(0, len(data), batch_size)):
+        batch = data[start : start + batch_size]
+
+        batch_start = time.perf_counter()
+        batch_entities = model.batch_predict_entities(
+            batch, entity_list, threshold=0.5
+        )
+        elapsed = time.perf_counter() - batch_start
+
+        print(
+            f"GLiNER batch {batch_num + 1}/{n_batches}: {len(batch)} notes in "
+            f"{elapsed:.2f}s ({len(batch) / max(elapsed, 1e-9):.2f} notes/sec)"
+        )
+
+        for patient_entities in batch_entities:
+            total_patients_entities.append({"Entities": patient_entities})
+            if on_patient is not None:
+                on_patient(total_patients_entities[-1])
 
     return total_patients_entities
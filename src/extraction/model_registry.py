@@ -0,0 +1,88 @@
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded NER models keyed by backend and model id, so that
+    repeated extractions reuse one loaded model instead of reloading it.
+
+    When the estimated memory of the loaded models goes over max_memory_mb, the least
+    recently used models are dropped. The most recently loaded model is always kept.
+    """
+
+    def __init__(self, max_memory_mb: float = 8192) -> None:
+        """
+        Args:
+            max_memory_mb (float, optional): Memory budget for the loaded models in megabytes. Defaults to 8192.
+        """
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.models = OrderedDict()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Estimated memory used by the loaded models in bytes."""
+        return sum(size for _, size in self.models.values())
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the model stored under key, loading it with loader if it is not loaded yet.
+
+        Args:
+            key (Hashable): Identifies the model, e.g. (backend, model id).
+            loader (Callable[[], Any]): Loads the model when it is not in the registry.
+
+        Returns:
+            Any: The loaded model.
+        """
+        if key in self.models:
+            self.models.move_to_end(key)
+            return self.models[key][0]
+
+        model = loader()
+        self.models[key] = (model, estimate_model_memory(model))
+        self.evict()
+        return model
+
+    def evict(self) -> None:
+        """Drops the least recently used models until the registry fits in max_memory_mb."""
+        while (
+            len(self.models) > 1 and self.memory_bytes > self.max_memory_bytes
+        ):
+            self.models.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops every loaded model."""
+        self.models.clear()
+
+
+def estimate_model_memory(model: Any) -> int:
+    """
+    Estimates the memory held by a loaded model.
+
+    Torch models (e.g. GLiNER) are measured by the size of their parameters and buffers,
+    LlamaCpp models by the size of their model file. Ollama models live in the Ollama
+    server, so they count as 0.
+
+    Args:
+        model (Any): A loaded model.
+
+    Returns:
+        int: Estimated size in bytes.
+    """
+    if hasattr(model, "parameters") and hasattr(model, "buffers"):
+        return sum(
+            tensor.numel() * tensor.element_size()
+            for tensors in [model.parameters(), model.buffers()]
+            for tensor in tensors
+        )
+
+    model_path = getattr(model, "model_path", None)
+    if model_path is not None and os.path.isfile(model_path):
+        return os.path.getsize(model_path)
+
+    return 0
+
+
+model_registry = ModelRegistry()
@@ -1,18 +1,35 @@
 from ..utils import load_json_from_path_or_variable, save_json, load_json
 
+import os
 import json
+import time
+import asyncio
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.llms import Ollama
 from langchain.prompts import PromptTemplate
-from typing import List, Dict, Any, Union
+from langchain.schema.runnable import Runnable
+from typing import List, Dict, Any, Union, Optional, Tuple, Callable
 
 from src.config.experimental_config import GenerateConfig
 from src.config.prompt_template_handler import (
     load_and_validate_generate_prompt_template,
 )
-from src.utils import file_exists
+from src.utils import (
+    file_exists,
+    run_coroutine,
+    summarise_latencies,
+    get_jsonl_path,
+    append_jsonl,
+    iter_jsonl,
+    repair_jsonl,
+)
 from src.config.global_config import GlobalConfig
+from src.llm_cache import (
+    LLMResponseCache,
+    load_llm_cache,
+    get_llm_cache_identity,
+)
 
 
 class GenerateLLM:
@@ -35,15 +52,21 @@ class GenerateLLM:
         Args:
             global_config (GlobalConfig): This is a pydantic typing model that contains configuration parameters from global config.
             generateconfig (GenerateConfig): A pydantic typed config model with values of llm_model_name,
-                                             prompt_template_path, synthea_path, and path_output.
+                                             prompt_template_path, base_url, synthea_path, path_output,
+                                             max_concurrency and request_timeout.
             synthea_input (List[Dict[str, Any]]): Synthea output data or variable name containing Synthea output data.
         """
         GenerateConfig.model_validate(generateconfig.model_dump())
 
         self.synthea_input = synthea_input
         self.llm_model_name = generateconfig.llm_model_features.llm_model_name
+        self.base_url = generateconfig.llm_model_features.base_url
         self.synthea_path = generateconfig.synthea_path
         self.path_output = generateconfig.path_output
+        self.max_concurrency = generateconfig.max_concurrency
+        self.request_timeout = generateconfig.request_timeout
+        self.generation_stats = dict()
+        self.llm_cache = load_llm_cache(global_config)
 
         full_template_path = f"{global_config.output_paths.generate_template}/{generateconfig.llm_model_features.prompt_template_path}"
         self.prompt_template = load_and_validate_generate_prompt_template(
@@ -55,17 +78,25 @@ class GenerateLLM:
         verbose: bool = False,
         overwrite: bool = False,
         save: bool = True,
-    ) -> List[str]:
+    ) -> List[Optional[str]]:
         """
         Generate or Load synthetic medical notes from Synthea data.
 
+        While generating, each finished note is appended to a JSONL checkpoint next to
+        path_output, keyed by its Synthea record index. If a run stops part way, the next
+        run only generates the records missing from the checkpoint.
+
+        A note that takes longer than request_timeout is counted as failed and left out of the
+        checkpoint, and the output is not saved, so the next run retries only the failed notes.
+
         Args:
             verbose (bool): Decides whether verbose is true or false. Defaults to False.
-            overwrite (bool): Decides whether to overwrite a model or not. Defaults to False.
+            overwrite (bool): Decides whether to overwrite a model or not. This also skips reading the LLM cache,
+                              so notes are generated again, while new notes are still written to it. Defaults to False.
             save (bool): Determines whether you want to save any files, if this is false it doesn't save any files. Defaults to True.
 
         Returns:
-            List[str]: Generated a list of synthetic medical notes.
+            List[Optional[str]]: Generated a list of synthetic medical notes, None for notes that timed out.
         """
 
         if file_exists(self.path_output) and not overwrite:
@@ -79,21 +110,171 @@ class GenerateLLM:
                 callback_manager.add_handler(StreamingStdOutCallbackHandler())
 
             llm = Ollama(
-                model=self.llm_model_name, callback_manager=callback_manager
+                model=self.llm_model_name,
+                base_url=self.base_url,
+                callback_manager=callback_manager,
+                timeout=self.request_timeout,
             )
 
             prompt = PromptTemplate.from_template(self.prompt_template)
             chain = prompt | llm
 
-            output = chain.batch(batch)
+            checkpoint_path = None
+            notes = dict()
+            if save and self.path_output is not None:
+                checkpoint_path = get_jsonl_path(self.path_output)
+                if overwrite and file_exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+                notes = load_checkpointed_notes(checkpoint_path)
 
-            if save:
+            missing = [i for i in range(len(batch)) if i not in notes]
+            if notes:
+                print(
+                    f"Resuming from checkpoint: {len(batch) - len(missing)} notes done, {len(missing)} to generate."
+                )
+
+            def checkpoint_note(position: int, note: str) -> None:
+                notes[missing[position]] = note
+                if checkpoint_path is not None:
+                    append_jsonl(
+                        {"index": missing[position], "note": note},
+                        checkpoint_path,
+                    )
+
+            cache_keys = None
+            if self.llm_cache is not None:
+                self.llm_cache.refresh = overwrite
+                identity = get_llm_cache_identity(llm)
+                cache_keys = [
+                    self.llm_cache.make_key(
+                        identity["model_name"],
+                        prompt.format(**batch[i]),
+                        identity["params"],
+                    )
+                    for i in missing
+                ]
+
+            start = time.perf_counter()
+            generated, latencies = run_coroutine(
+                generate_notes(
+                    chain,
+                    [batch[i] for i in missing],
+                    self.max_concurrency,
+                    self.request_timeout,
+                    on_note=checkpoint_note,
+                    cache=self.llm_cache,
+                    cache_keys=cache_keys,
+                )
+            )
+            n_failed = sum(note is None for note in generated)
+            self.generation_stats = summarise_latencies(
+                latencies,
+                time.perf_counter() - start,
+                unit="notes",
+                failed=n_failed,
+            )
+            if self.llm_cache is not None:
+                self.generation_stats["cache_hit_rate"] = (
+                    self.llm_cache.hit_rate()
+                )
+                print(f"LLM cache hit rate: {self.llm_cache.hit_rate():.1%}")
+
+            output = [notes.get(i) for i in range(len(batch))]
+
+            if n_failed > 0:
+                print(
+                    f"{n_failed} notes timed out after {self.request_timeout}s and are None in the output, "
+                    "run again to retry them."
+                )
+            elif save:
                 if overwrite or not file_exists(self.path_output):
                     save_json(output, self.path_output)
 
         return output
 
 
+async def generate_notes(
+    chain: Runnable,
+    batch: List[Dict[str, str]],
+    max_concurrency: int,
+    request_timeout: Optional[float] = None,
+    on_note: Optional[Callable[[int, str], None]] = None,
+    cache: Optional[LLMResponseCache] = None,
+    cache_keys: Optional[List[str]] = None,
+) -> Tuple[List[Optional[str]], List[float]]:
+    """
+    Runs the prompt chain asynchronously over a batch, with at most max_concurrency
+    requests in flight at once.
+
+    A request that takes longer than request_timeout fails on its own: its note is None and
+    on_note is not called for it, while the rest of the batch carries on.
+
+    Args:
+        chain (Runnable): The prompt and LLM chain.
+        batch (List[Dict[str, str]]): Batch data created by get_batch.
+        max_concurrency (int): Maximum number of requests sent to the model at the same time.
+        request_timeout (Optional[float], optional): Seconds to wait for each note before it fails. Defaults to None.
+        on_note (Optional[Callable[[int, str], None]], optional): Called with the position in the batch and the note
+                                                                  as soon as each note is generated. Defaults to None.
+        cache (Optional[LLMResponseCache], optional): Response cache checked before calling the model. Defaults to None.
+        cache_keys (Optional[List[str]], optional): Cache key of each record in the batch, required with cache. Defaults to None.
+
+    Returns:
+        Tuple[List[Optional[str]], List[float]]: Generated notes in the order of the batch, None for failed notes, and the
+                                                 latency of each generated note in seconds.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    latencies = [None] * len(batch)
+
+    async def generate_note(
+        index: int, record: Dict[str, str]
+    ) -> Optional[str]:
+        async with semaphore:
+            start = time.perf_counter()
+            note = None
+            if cache is not None:
+                note = cache.get(cache_keys[index])
+            if note is None:
+                try:
+                    note = await asyncio.wait_for(
+                        chain.ainvoke(record), timeout=request_timeout
+                    )
+                except asyncio.TimeoutError:
+                    return None
+                if cache is not None:
+                    cache.set(cache_keys[index], note)
+            latencies[index] = time.perf_counter() - start
+            if on_note is not None:
+                on_note(index, note)
+            return note
+
+    notes = await asyncio.gather(
+        *[generate_note(i, record) for i, record in enumerate(batch)]
+    )
+    return list(notes), [
+        latency for latency in latencies if latency is not None
+    ]
+
+
+def load_checkpointed_notes(checkpoint_path: str) -> Dict[int, str]:
+    """
+    Loads the notes already generated in a JSONL checkpoint.
+
+    Args:
+        checkpoint_path (str): Path to the JSONL checkpoint.
+
+    Returns:
+        Dict[int, str]: Generated notes keyed by their Synthea record index, empty if there is no checkpoint.
+    """
+    if not file_exists(checkpoint_path):
+        return dict()
+    repair_jsonl(checkpoint_path)
+    return {
+        record["index"]: record["note"]
+        for record in iter_jsonl(checkpoint_path)
+    }
+
+
 def get_batch(
     from_variable: List[Dict[str, Any]], from_path: str
 ) -> List[Dict[str, str]]:
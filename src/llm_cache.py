@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+from src.config.global_config import GlobalConfig
+
+
+class LLMResponseCache:
+    """
+    On disk cache of LLM responses, keyed by a hash of the model name, the rendered
+    prompt and the generation parameters. Each response is stored in its own JSON file.
+    When the files go over max_size_mb the least recently used responses are evicted, down to
+    evict_fraction of max_size_mb so that the next writes do not evict again straight away.
+
+    The size and last use of each file are kept in an index in memory. It is built from the
+    folder on the first write, then updated by get and set, so the folder is only listed once.
+
+    With refresh set, lookups always miss but new responses are still stored, so a rerun
+    that asks for fresh output replaces the cached responses instead of reusing them.
+
+    Extraction worker processes each get a copy of the cache that shares the folder. A file
+    removed by another process is treated as a miss, or as already evicted. Each copy only
+    indexes the files that existed when its index was built and the ones it wrote itself. The
+    hit and miss counts of a worker's copy are not reported back to the parent process.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size_mb: float = 1024,
+        refresh: bool = False,
+        evict_fraction: float = 0.9,
+    ) -> None:
+        """
+        Initialises the cache, creating cache_dir if needed.
+
+        Args:
+            cache_dir (str): Folder where cached responses are stored.
+            max_size_mb (float, optional): Maximum total size of the cached responses in megabytes. Defaults to 1024.
+            refresh (bool, optional): Skip cache reads while still writing responses. Defaults to False.
+            evict_fraction (float, optional): Share of max_size_mb the cache is evicted down to. Defaults to 0.9.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.evict_to_bytes = int(self.max_size_bytes * evict_fraction)
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        # Path of each cached file to its last use time and size, built on the first write.
+        self._index: Optional[Dict[str, Tuple[float, int]]] = None
+        self.size_bytes = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, params: Dict[str, Any]) -> str:
+        """
+        Creates the cache key of a request.
+
+        Args:
+            model_name (str): Name or path of the model.
+            prompt (str): The fully rendered prompt.
+            params (Dict[str, Any]): Generation parameters of the model.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        request = json.dumps(
+            {"model": model_name, "prompt": prompt, "params": params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response for a key, or None if it is not cached.
+
+        Args:
+            key (str): Key created by make_key.
+
+        Returns:
+            Optional[str]: The cached response.
+        """
+        if self.refresh:
+            self.misses += 1
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                response = json.load(f)["response"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.misses += 1
+            return None
+
+        # Touch the file so eviction treats it as recently used.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process since it was read, the response is still valid.
+            pass
+        if self._index is not None and path in self._index:
+            self._index[path] = (time.time(), self._index[path][1])
+        self.hits += 1
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Stores a response, then evicts old responses if the cache is over its size limit.
+
+        Args:
+            key (str): Key created by make_key.
+            response (str): The LLM response.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        index = self._get_index()
+
+        # Write to a temporary file first so a crash never leaves half a response.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as f:
+            json.dump({"response": response}, f)
+        os.replace(tmp_path, path)
+
+        _, previous_size = index.get(path, (None, 0))
+        size = _file_size(path)
+        index[path] = (time.time(), size)
+        self.size_bytes += size - previous_size
+        if self.size_bytes > self.max_size_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently used responses until the cache fits in evict_fraction of max_size_mb."""
+        index = self._get_index()
+        for path, (_, size) in sorted(index.items(), key=lambda item: item[1]):
+            if self.size_bytes <= self.evict_to_bytes:
+                break
+            del index[path]
+            self.size_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by another process.
+                pass
+
+    def hit_rate(self) -> float:
+        """Returns the share of lookups that were served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _get_index(self) -> Dict[str, Tuple[float, int]]:
+        """Returns the index of cached files, listing the folder the first time it is needed."""
+        if self._index is None:
+            self._index = {
+                path: (mtime, size)
+                for mtime, size, path in self._cached_file_stats()
+            }
+            self.size_bytes = sum(size for _, size in self._index.values())
+        return self._index
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _cached_files(self):
+        for root, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith(".json"):
+                    yield os.path.join(root, filename)
+
+    def _cached_file_stats(self):
+        """Yields the modified time, size and path of each cached file, skipping files
+        removed by another process while listing."""
+        for path in self._cached_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+
+def _file_size(path: str) -> int:
+    """Size of a file in bytes, 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def load_llm_cache(global_config: GlobalConfig) -> Optional[LLMResponseCache]:
+    """
+    Creates the LLM response cache set in the global config.
+
+    Args:
+        global_config (GlobalConfig): This is a pydantic typing model that contains configuration parameters from global config.
+
+    Returns:
+        Optional[LLMResponseCache]: The cache, or None if llm_cache is not set in the global config.
+    """
+    if global_config.llm_cache is None:
+        return None
+    return LLMResponseCache(
+        cache_dir=global_config.llm_cache.cache_dir,
+        max_size_mb=global_config.llm_cache.max_size_mb,
+    )
+
+
+def get_llm_cache_identity(llm: Any) -> Dict[str, Any]:
+    """
+    Returns the model name and generation parameters of a langchain LLM, used to key the cache.
+
+    Args:
+        llm (Any): A langchain Ollama or LlamaCpp LLM.
+
+    Returns:
+        Dict[str, Any]: Dictionary with the model name and the generation parameters.
+    """
+    model_name = getattr(llm, "model", None) or getattr(
+        llm, "model_path", None
+    )
+    # _default_params holds the generation options both Ollama and LlamaCpp send
+    # with every request.
+    params = getattr(llm, "_default_params", dict())
+    return {"model_name": model_name, "params": params}
+
+
+def cached_llm_call(
+    llm: Any, prompt: str, cache: Optional[LLMResponseCache] = None
+) -> str:
+    """
+    Calls a langchain LLM with a prompt, serving the response from the cache when possible.
+
+    Args:
+        llm (Any): A langchain Ollama or LlamaCpp LLM.
+        prompt (str): The fully rendered prompt.
+        cache (Optional[LLMResponseCache], optional): Response cache, if None the LLM is always called. Defaults to None.
+
+    Returns:
+        str: The LLM response.
+    """
+    if cache is None:
+        return llm(prompt)
+
+    identity = get_llm_cache_identity(llm)
+    key = cache.make_key(identity["model_name"], prompt, identity["params"])
+    response = cache.get(key)
+    if response is None:
+        response = llm(prompt)
+        cache.set(key, response)
+    return response
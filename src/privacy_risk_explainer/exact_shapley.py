@@ -0,0 +1,136 @@
+import math
+import shap
+import pandas as pd
+import numpy as np
+from typing import Callable, Dict
+
+# 2^n coalitions are scored per record, so exact values are only practical
+# for a small number of quasi-identifier columns.
+MAX_EXACT_FEATURES = 16
+
+
+class ExactShapleyExplainer:
+    """Computes exact Shapley values for a prediction function by listing every
+    coalition of features. Features outside a coalition take the value of the
+    baseline record, the same masking the SHAP explainer uses with a single
+    baseline record.
+
+    Each masked record is only scored once: scores are memoised across records
+    and across calls, and every new masked record in a call is scored in one
+    call to the prediction function. It can be called in the same way as a
+    `shap.Explainer` and returns a `shap.Explanation`.
+    """
+
+    def __init__(
+        self,
+        prediction: Callable,
+        baseline: np.ndarray,
+        max_coalition_rows: int = 2**20,
+    ):
+        """
+        Args:
+            prediction (Callable): Function that scores a 2D array of records.
+            baseline (np.ndarray): 1-by-N baseline record.
+            max_coalition_rows (int, optional): Maximum number of masked records built at once,
+                                                records are explained in chunks to stay under it.
+                                                Defaults to 2**20.
+        """
+        self.prediction = prediction
+        self.baseline = np.asarray(baseline).reshape(-1)
+        self.n_features = self.baseline.shape[0]
+
+        if self.n_features > MAX_EXACT_FEATURES:
+            raise ValueError(
+                f"Exact Shapley values are limited to {MAX_EXACT_FEATURES} features, got {self.n_features}."
+            )
+
+        n_coalitions = 2**self.n_features
+        self.coalition_ids = np.arange(n_coalitions)
+        # Row k holds True for every feature whose bit is set in k.
+        self.coalitions = (
+            (self.coalition_ids[:, None] >> np.arange(self.n_features)) & 1
+        ).astype(bool)
+        coalition_sizes = self.coalitions.sum(axis=1)
+        # Shapley weight |S|! (n - |S| - 1)! / n! of adding a feature to S.
+        size_weights = np.array(
+            [
+                math.factorial(size)
+                * math.factorial(self.n_features - size - 1)
+                / math.factorial(self.n_features)
+                for size in range(self.n_features)
+            ]
+        )
+        self.without_feature = []
+        self.with_feature = []
+        self.weights = []
+        for i in range(self.n_features):
+            without = self.coalition_ids[(self.coalition_ids >> i) & 1 == 0]
+            self.without_feature.append(without)
+            self.with_feature.append(without | (1 << i))
+            self.weights.append(size_weights[coalition_sizes[without]])
+
+        self.chunk_size = max(1, max_coalition_rows // n_coalitions)
+        self.score_cache: Dict[bytes, float] = {}
+
+    def __call__(self, data: pd.DataFrame) -> shap._explanation.Explanation:
+        """Calculate exact Shapley values for every record in data.
+
+        Args:
+            data (pd.DataFrame): Records to explain, with the same columns as the baseline.
+
+        Returns:
+            shap._explanation.Explanation: Shapley values, base values and data for each record.
+        """
+        records = np.asarray(data)
+        values = np.zeros(records.shape, dtype=np.float64)
+        base_values = np.zeros(records.shape[0], dtype=np.float64)
+
+        for start in range(0, records.shape[0], self.chunk_size):
+            chunk = records[start : start + self.chunk_size]
+            coalition_scores = self.score_coalitions(chunk)
+            for i in range(self.n_features):
+                values[start : start + len(chunk), i] = (
+                    coalition_scores[:, self.with_feature[i]]
+                    - coalition_scores[:, self.without_feature[i]]
+                ) @ self.weights[i]
+            base_values[start : start + len(chunk)] = coalition_scores[:, 0]
+
+        feature_names = (
+            data.columns.to_list() if isinstance(data, pd.DataFrame) else None
+        )
+        return shap.Explanation(
+            values=values,
+            base_values=base_values,
+            data=records,
+            feature_names=feature_names,
+        )
+
+    def score_coalitions(self, records: np.ndarray) -> np.ndarray:
+        """Score every coalition of every record, scoring only masked records
+        that are not already in the cache.
+
+        Args:
+            records (np.ndarray): 2D array of records.
+
+        Returns:
+            np.ndarray: Array of shape (number of records, 2^n) of coalition scores.
+        """
+        masked = np.where(
+            self.coalitions[None, :, :], records[:, None, :], self.baseline
+        ).reshape(-1, self.n_features)
+
+        unique_masked, inverse = np.unique(masked, axis=0, return_inverse=True)
+        keys = [record.tobytes() for record in unique_masked]
+        unseen = [
+            i for i, key in enumerate(keys) if key not in self.score_cache
+        ]
+
+        if unseen:
+            unseen_scores = self.prediction(unique_masked[unseen])
+            for i, score in zip(unseen, np.asarray(unseen_scores).reshape(-1)):
+                self.score_cache[keys[i]] = float(score)
+
+        unique_scores = np.array(
+            [self.score_cache[key] for key in keys], dtype=np.float64
+        )
+        return unique_scores[inverse.reshape(-1)].reshape(records.shape[0], -1)
@@ -3,6 +3,7 @@ import shap
 import pandas as pd
 import numpy as np
 from src.config.experimental_config import Explainers
+from src.privacy_risk_explainer.exact_shapley import ExactShapleyExplainer
 
 
 class PrivacyRiskExplainer:
@@ -14,6 +15,9 @@ class PrivacyRiskExplainer:
     baseline vector that representes the most common record in the copula
     model representation. The mask is a vector of 1s of size 1-by-N the
     number of features.
+    If `exact_shapley` is set in the config, the SHAP explainer is replaced
+    by an exact Shapley engine that lists every coalition of features and
+    scores each masked record once.
     """
 
     def __init__(
@@ -30,7 +34,12 @@ class PrivacyRiskExplainer:
             self.prediction = prediction
             self.mask = np.array([1] * n_features).reshape(1, n_features)
             self.unmasked_index = []
-            self.explainer = shap.Explainer(self.prediction, self.mask)
+            if explainer_config.exact_shapley:
+                self.explainer = ExactShapleyExplainer(
+                    self.prediction, self.mask
+                )
+            else:
+                self.explainer = shap.Explainer(self.prediction, self.mask)
 
         else:
             raise ValueError(
@@ -51,12 +60,10 @@ class PrivacyRiskExplainer:
         pd.Series with global shap values
         shap object that facilitates the plotting functions"""
         orig_index = data.index.tolist()
-        masked_records = pd.Series(self.mask[0], index=data.columns)
-        mask_index = data.loc[
-            data.apply(lambda x: x.equals(masked_records), axis=1)
-        ].index.tolist()
-        self.unmasked_index = [i for i in orig_index if i not in mask_index]
-        explanation = self.explainer(data.loc[self.unmasked_index])
+        is_baseline = (data.to_numpy() == self.mask[0]).all(axis=1)
+        mask_index = data.index[is_baseline].tolist()
+        self.unmasked_index = data.index[~is_baseline].tolist()
+        explanation = self.explain_unique_records(data.loc[~is_baseline])
         if len(mask_index) > 0:
             local_explanation_values = pd.concat(
                 [
@@ -86,6 +93,39 @@ class PrivacyRiskExplainer:
             explanation,
         )
 
+    def explain_unique_records(
+        self, data: pd.DataFrame
+    ) -> shap._explanation.Explanation:
+        """Explain each unique record once and broadcast the explanation back
+        to every record, so identical records do not call the explainer again.
+
+        :params data: transformed pd.DataFrame of non baseline records
+        :returns: shap object with one explanation per record of data, in the same order
+        """
+        records = data.to_numpy()
+        unique_records, inverse = np.unique(
+            records, axis=0, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+
+        if unique_records.shape[0] == 0:
+            return shap.Explanation(
+                values=np.zeros(records.shape),
+                base_values=np.zeros(0),
+                data=records,
+                feature_names=data.columns.to_list(),
+            )
+
+        unique_explanation = self.explainer(
+            pd.DataFrame(unique_records, columns=data.columns)
+        )
+        return shap.Explanation(
+            values=unique_explanation.values[inverse],
+            base_values=np.asarray(unique_explanation.base_values)[inverse],
+            data=records,
+            feature_names=data.columns.to_list(),
+        )
+
     def plot_local_explanation(
         self,
         explanation: shap._explanation.Explanation,
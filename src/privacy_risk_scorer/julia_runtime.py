@@ -0,0 +1,201 @@
+import os
+import time
+import shutil
+import julia
+from julia.api import Julia
+from typing import Optional
+
+
+# Scores every row of an integer matrix inside Julia, so a whole dataset
+# only crosses the Python/Julia boundary once.
+BATCH_INDIVIDUAL_UNIQUENESS_JL = """
+function privfp_batch_individual_uniqueness(G, X::AbstractMatrix, N)
+    scores = Vector{Float64}(undef, size(X, 1))
+    for i in 1:size(X, 1)
+        scores[i] = CorrectMatch.individual_uniqueness(G, X[i, :], N)
+    end
+    return scores
+end
+"""
+
+# Splits the matrix into contiguous shards scored on separate Julia threads,
+# then concatenates the shard scores back in the original row order.
+SHARDED_INDIVIDUAL_UNIQUENESS_JL = """
+function privfp_sharded_individual_uniqueness(G, X::AbstractMatrix, N, n_shards::Integer)
+    bounds = round.(Int, range(0, size(X, 1); length=n_shards + 1))
+    tasks = [
+        Threads.@spawn privfp_batch_individual_uniqueness(
+            G, X[(bounds[k] + 1):bounds[k + 1], :], N
+        )
+        for k in 1:n_shards
+    ]
+    return reduce(vcat, fetch.(tasks))
+end
+"""
+
+_runtime = None
+
+
+class JuliaRuntime:
+    """Holds the initialised Julia runtime, the correctmatch module and the
+    Julia helper functions used by the PrivacyRiskScorer.
+
+    A Julia runtime can only be started once per Python process, so this
+    should be created through `get_julia_runtime` rather than directly.
+    """
+
+    def __init__(
+        self,
+        sysimage_path: Optional[str] = None,
+        build_sysimage: bool = False,
+        n_threads: Optional[int] = None,
+        install_marker_dir: str = "~/.julia/privfp",
+    ) -> None:
+        """Installs PyCall if needed, starts Julia and precompiles correctmatch.
+
+        Args:
+            sysimage_path (Optional[str], optional): Path to a custom Julia sysimage with PyCall compiled in. Defaults to None.
+            build_sysimage (bool, optional): Build the sysimage at sysimage_path if it does not exist yet. Defaults to False.
+            n_threads (Optional[int], optional): Number of Julia threads to start with, used for sharded scoring.
+                                                 Defaults to None, which keeps JULIA_NUM_THREADS or Julia's default.
+            install_marker_dir (str, optional): Folder used to remember that `julia.install` has already run
+                                                for a given Julia binary. Defaults to "~/.julia/privfp".
+        """
+        start = time.perf_counter()
+
+        self.path_julia = find_julia_executable()
+        self.sysimage_path = sysimage_path
+
+        install_julia_once(self.path_julia, install_marker_dir)
+
+        # Julia reads the thread count when it starts, so it has to be set first.
+        if n_threads is not None:
+            os.environ["JULIA_NUM_THREADS"] = str(n_threads)
+
+        if sysimage_path is not None:
+            if not os.path.isfile(sysimage_path):
+                if not build_sysimage:
+                    raise FileNotFoundError(
+                        f"No Julia sysimage found at '{sysimage_path}', set pycorrectmatch.build_sysimage to true to build it."
+                    )
+                build_julia_sysimage(sysimage_path, self.path_julia)
+            # A sysimage built for this Python has PyCall compiled in, so
+            # cached compiled modules can be used.
+            Julia(runtime=self.path_julia, sysimage=sysimage_path)
+        else:
+            Julia(compiled_modules=False, runtime=self.path_julia)
+
+        import correctmatch  # noqa E402
+        from julia import Main  # noqa E402
+
+        correctmatch.precompile()
+        Main.eval("using CorrectMatch")
+        Main.eval("using Serialization")
+
+        self.correctmatch = correctmatch
+        self.main = Main
+        self.batch_individual_uniqueness = Main.eval(
+            BATCH_INDIVIDUAL_UNIQUENESS_JL
+        )
+        self.sharded_individual_uniqueness = Main.eval(
+            SHARDED_INDIVIDUAL_UNIQUENESS_JL
+        )
+        self.n_threads = int(Main.eval("Threads.nthreads()"))
+
+        self.startup_seconds = time.perf_counter() - start
+        print(
+            f"Julia runtime started in {self.startup_seconds:.2f}s with {self.n_threads} thread(s)."
+        )
+
+
+def find_julia_executable() -> str:
+    """Finds the julia executable on the PATH.
+
+    Raises:
+        FileNotFoundError: If julia cannot be found.
+
+    Returns:
+        str: Path to the julia executable.
+    """
+    path_julia = shutil.which("julia")
+    if path_julia is None:
+        raise FileNotFoundError(
+            "Could not find julia on the PATH, see docs/setup/julia-install.md"
+        )
+    return path_julia
+
+
+def install_julia_once(path_julia: str, install_marker_dir: str) -> None:
+    """Runs `julia.install` for a Julia binary only the first time it is seen,
+    and leaves a marker file so later runs and notebook restarts skip it.
+
+    Args:
+        path_julia (str): Path to the julia executable.
+        install_marker_dir (str): Folder where the marker files are kept.
+    """
+    marker_dir = os.path.expanduser(install_marker_dir)
+    marker_name = (
+        os.path.realpath(path_julia).strip(os.sep).replace(os.sep, "_")
+    )
+    marker_path = os.path.join(marker_dir, f"installed_{marker_name}")
+
+    if os.path.isfile(marker_path):
+        return
+
+    julia.install(julia=path_julia)
+    os.makedirs(marker_dir, exist_ok=True)
+    with open(marker_path, "w") as f:
+        f.write(path_julia)
+
+
+def build_julia_sysimage(sysimage_path: str, path_julia: str) -> None:
+    """Builds a custom Julia sysimage with PyCall compiled for this Python.
+
+    Args:
+        sysimage_path (str): Where the sysimage should be written.
+        path_julia (str): Path to the julia executable.
+    """
+    from julia.sysimage import build_sysimage  # noqa E402
+
+    sysimage_dir = os.path.dirname(sysimage_path)
+    if sysimage_dir:
+        os.makedirs(sysimage_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    build_sysimage(sysimage_path, julia=path_julia)
+    print(
+        f"Julia sysimage built at '{sysimage_path}' in {time.perf_counter() - start:.2f}s."
+    )
+
+
+def get_julia_runtime(
+    sysimage_path: Optional[str] = None,
+    build_sysimage: bool = False,
+    n_threads: Optional[int] = None,
+) -> JuliaRuntime:
+    """Returns the Julia runtime shared by every PrivacyRiskScorer in this
+    process, starting it on the first call.
+
+    Args:
+        sysimage_path (Optional[str], optional): Path to a custom Julia sysimage. Defaults to None.
+        build_sysimage (bool, optional): Build the sysimage if it does not exist yet. Defaults to False.
+        n_threads (Optional[int], optional): Number of Julia threads to start with. Defaults to None.
+
+    Returns:
+        JuliaRuntime: The initialised Julia runtime.
+    """
+    global _runtime
+
+    if _runtime is None:
+        _runtime = JuliaRuntime(
+            sysimage_path=sysimage_path,
+            build_sysimage=build_sysimage,
+            n_threads=n_threads,
+        )
+    elif sysimage_path != _runtime.sysimage_path:
+        print(
+            "Julia is already running in this process, reusing it with "
+            f"sysimage '{_runtime.sysimage_path}' instead of '{sysimage_path}'."
+        )
+
+    return _runtime
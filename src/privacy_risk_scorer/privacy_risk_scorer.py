@@ -1,10 +1,17 @@
 import os
-import julia
+import pickle
+import hashlib
 import pandas as pd
 import numpy as np
-from julia.api import Julia
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 from src.config.experimental_config import Pycorrectmatch
+from src.privacy_risk_scorer.julia_runtime import get_julia_runtime
+
+# Marks values in `map_records_to_copula` that were not seen when fitting.
+UNSEEN_VALUE = 0
+
+MODEL_FILENAME = "copula_model.jls"
+LOOKUP_FILENAME = "lookup.pkl"
 
 
 class PrivacyRiskScorer:
@@ -21,14 +28,30 @@ class PrivacyRiskScorer:
 
         if scorer_config.privacy_scorer:
 
-            path_julia = os.popen("which julia").read().strip()
-            julia.install(julia=path_julia)
-            Julia(compiled_modules=False, runtime=path_julia)
-            import correctmatch  # noqa E402
-
-            correctmatch.precompile()
+            # The Julia runtime is started once and shared by every scorer.
+            self.runtime = get_julia_runtime(
+                sysimage_path=scorer_config.julia_sysimage_path,
+                build_sysimage=scorer_config.build_sysimage,
+                n_threads=scorer_config.julia_threads,
+            )
 
-            self.correctmatch = correctmatch
+            self.correctmatch = self.runtime.correctmatch
+            self.julia_batch_score = self.runtime.batch_individual_uniqueness
+            self.julia_sharded_score = (
+                self.runtime.sharded_individual_uniqueness
+            )
+            self.scoring_workers = scorer_config.scoring_workers
+            if self.scoring_workers > self.runtime.n_threads:
+                print(
+                    f"Julia is running with {self.runtime.n_threads} thread(s), so "
+                    f"{self.scoring_workers} scoring workers will share them."
+                )
+            self.batch_scoring = scorer_config.batch_scoring
+            self.use_score_cache = scorer_config.score_cache
+            self.score_cache = {}
+            self.last_scoring_stats = {}
+            self.copula_cache_dir = scorer_config.copula_cache_dir
+            self.model_hash = None
             self.fitted_model = None
             self.size = 0
 
@@ -46,13 +69,72 @@ class PrivacyRiskScorer:
         The fitted model is a Julia object with the estimated model.
         The argument `exact_marginal`=True ensures that the marginal distributions
         are categorical, whose values range from 1 to number_of_unique_values for each feature.
+
+        If `copula_cache_dir` is set in the config, a model previously fitted on the same
+        dataframe is loaded from disk instead, and newly fitted models are saved there.
         """
+        self.model_hash = hash_dataframe(df)
+        if self.copula_cache_dir is not None:
+            if self.load(self.copula_cache_dir, self.model_hash):
+                return
+
         self.size = df.shape[0]
         self.look_up = self.create_lookup_dict(df)
+        self.copula_categories = self.create_copula_categories(self.look_up)
+        self.score_cache = {}
         self.fitted_model = self.correctmatch.fit_model(
             df.values, exact_marginal=True
         )
 
+        if self.copula_cache_dir is not None:
+            self.save(self.copula_cache_dir)
+
+    def save(self, directory: str) -> str:
+        """Save the fitted Julia model, the look up dictionaries and the size of the
+        fitted dataset to a folder named after the hash of the fitted dataframe.
+
+        :param directory: folder under which the model folder is created
+        :returns path to the folder the model was saved in
+        """
+        if self.fitted_model is None:
+            raise Exception("Please fit the model first.")
+
+        model_dir = os.path.join(directory, self.model_hash)
+        os.makedirs(model_dir, exist_ok=True)
+
+        self.runtime.main.serialize(
+            os.path.join(model_dir, MODEL_FILENAME), self.fitted_model
+        )
+        with open(os.path.join(model_dir, LOOKUP_FILENAME), "wb") as f:
+            pickle.dump({"look_up": self.look_up, "size": self.size}, f)
+
+        return model_dir
+
+    def load(self, directory: str, model_hash: str) -> bool:
+        """Load a model saved with `save`.
+
+        :param directory: folder the model folder was created under
+        :param model_hash: hash of the dataframe the model was fitted on, see `hash_dataframe`
+        :returns True if a saved model was found and loaded, False otherwise
+        """
+        model_dir = os.path.join(directory, model_hash)
+        model_path = os.path.join(model_dir, MODEL_FILENAME)
+        lookup_path = os.path.join(model_dir, LOOKUP_FILENAME)
+        if not (os.path.isfile(model_path) and os.path.isfile(lookup_path)):
+            return False
+
+        with open(lookup_path, "rb") as f:
+            saved = pickle.load(f)
+
+        self.model_hash = model_hash
+        self.size = saved["size"]
+        self.look_up = saved["look_up"]
+        self.copula_categories = self.create_copula_categories(self.look_up)
+        self.score_cache = {}
+        self.fitted_model = self.runtime.main.deserialize(model_path)
+        print(f"Loaded fitted copula model from '{model_dir}'.")
+        return True
+
     def create_lookup_dict(
         self, df: pd.DataFrame
     ) -> Dict[str, Dict[int, int]]:
@@ -65,17 +147,29 @@ class PrivacyRiskScorer:
         :returns Dictionary that maps real feature values to the values of the marginal
         distributions of the copula model.
         """
-        record_to_copula = {
-            col: dict(
-                zip(
-                    df[col].value_counts().index,
-                    range(1, df[col].nunique() + 1),
-                )
+        record_to_copula = {}
+        for col in df.columns.to_list():
+            counts = df[col].value_counts()
+            record_to_copula[col] = dict(
+                zip(counts.index, range(1, len(counts) + 1))
             )
-            for col in df.columns.to_list()
-        }
         return record_to_copula
 
+    def create_copula_categories(
+        self, look_up: Dict[str, Dict[int, int]]
+    ) -> Dict[str, pd.Index]:
+        """
+        Create one pd.Index per column from the look up dictionary, ordered so that
+        the position of a value in the index plus one is its copula value.
+
+        :param look_up: Dictionary created by `create_lookup_dict`
+        :returns Dictionary of column name to pd.Index of the fitted values
+        """
+        return {
+            col: pd.Index(sorted(mapping, key=mapping.get))
+            for col, mapping in look_up.items()
+        }
+
     def map_record_to_copula(self, row: pd.Series) -> List[int]:
         """Convert real dataset values of a record to values that correspond to
         the marginal distributions of the fitted copula using the look up dictionary.
@@ -114,24 +208,45 @@ class PrivacyRiskScorer:
             name="individual_uniqueness_score",
         )
 
-    def map_records_to_copula(self, df: pd.DataFrame) -> pd.DataFrame:
+    def map_records_to_copula(
+        self, df: pd.DataFrame, unseen: str = "raise"
+    ) -> pd.DataFrame:
         """Convert real dataset values of a dataframe to values that correspond
         to the marginal distributions of the fitted copula using the look up dictionary.
 
+        Each column is mapped with a hash lookup against the values seen at fit time,
+        and the results are written straight into one int32 matrix.
+
         :param df: pd.DataFrame of the real records to be scored
+        :param unseen: "raise" to raise a ValueError for values that were not seen when
+        fitting, or "sentinel" to map them to UNSEEN_VALUE (0). Records holding the sentinel
+        cannot be scored and need to be dropped before calling `predict_transformed`.
         :returns pd.DataFrame of the transformed records, their values correpond to their
         representations of the marginal distributions of the copula model.
         """
         if self.fitted_model is None:
             raise Exception("Please fit the model first.")
-        transformed_df = pd.concat(
-            [
-                df[col].replace(self.look_up[col]).to_frame()
-                for col in df.columns
-            ],
-            axis=1,
+        if unseen not in ["raise", "sentinel"]:
+            raise ValueError("unseen must be either 'raise' or 'sentinel'.")
+
+        transformed_records = np.empty(df.shape, dtype=np.int32)
+        for i, col in enumerate(df.columns):
+            transformed_records[:, i] = (
+                self.copula_categories[col].get_indexer(df[col]) + 1
+            )
+
+        if unseen == "raise":
+            unseen_columns = df.columns[
+                (transformed_records == UNSEEN_VALUE).any(axis=0)
+            ].to_list()
+            if unseen_columns:
+                raise ValueError(
+                    f"Columns {unseen_columns} contain values that were not seen when fitting the model."
+                )
+
+        return pd.DataFrame(
+            transformed_records, index=df.index, columns=df.columns
         )
-        return transformed_df
 
     def score_func(self, transformed_row: List[int]) -> float:
         """Estimate individual uniquess for a tranformed record.
@@ -149,35 +264,162 @@ class PrivacyRiskScorer:
             self.size,
         )
 
-    def predict_transformed(self, transformed_df: pd.DataFrame) -> np.ndarray:
+    def predict_transformed(
+        self,
+        transformed_df: pd.DataFrame,
+        batched: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+    ) -> np.ndarray:
         """Return the privacy risk scores of the transformed records
 
         :param transformed_df: pd. DataFrame of the transformed records to be scored
+        :param batched: if True the whole matrix is scored in one Julia call, if False each
+        record is scored with its own call. Defaults to `batch_scoring` from the config.
+        :param use_cache: if True identical records are only scored once and scores are kept
+        between calls until the model is refitted. Defaults to `score_cache` from the config.
         :returns np.ndarray of the individual uniqueness scores for all transformed records
         in the transformed_df
         """
-        return np.apply_along_axis(
-            self.score_func, 1, transformed_df.astype("int")
+        if batched is None:
+            batched = self.batch_scoring
+        if use_cache is None:
+            use_cache = self.use_score_cache
+        transformed_records = np.asarray(transformed_df).astype(np.int64)
+        if use_cache:
+            return self.score_unique_records(transformed_records, batched)
+        self.last_scoring_stats = {
+            "records": transformed_records.shape[0],
+            "scored_records": transformed_records.shape[0],
+        }
+        return self.score_records(transformed_records, batched)
+
+    def score_records(
+        self, transformed_records: np.ndarray, batched: bool
+    ) -> np.ndarray:
+        """Score a 2D integer array of transformed records, either in one batch or row by row.
+
+        :param transformed_records: 2D integer np.ndarray, one transformed record per row.
+        :param batched: if True all records are scored in one Julia call.
+        :returns np.ndarray of the individual uniqueness scores, one per row.
+        """
+        if batched:
+            return self.score_transformed_records(transformed_records)
+        return np.apply_along_axis(self.score_func, 1, transformed_records)
+
+    def score_unique_records(
+        self, transformed_records: np.ndarray, batched: bool
+    ) -> np.ndarray:
+        """Score each unique transformed record once and scatter the scores back
+        to every record. Scores are kept in `score_cache`, keyed on the encoded record,
+        so later calls only score patterns that have not been seen since the last fit.
+
+        :param transformed_records: 2D integer np.ndarray, one transformed record per row.
+        :param batched: if True the unseen records are scored in one Julia call.
+        :returns np.ndarray of the individual uniqueness scores, one per row.
+        """
+        unique_records, inverse = np.unique(
+            transformed_records, axis=0, return_inverse=True
+        )
+        keys = [record.tobytes() for record in unique_records]
+        unseen = [
+            i for i, key in enumerate(keys) if key not in self.score_cache
+        ]
+
+        if unseen:
+            unseen_scores = self.score_records(unique_records[unseen], batched)
+            for i, score in zip(unseen, unseen_scores):
+                self.score_cache[keys[i]] = float(score)
+
+        self.last_scoring_stats = {
+            "records": transformed_records.shape[0],
+            "unique_records": len(keys),
+            "scored_records": len(unseen),
+        }
+
+        unique_scores = np.array(
+            [self.score_cache[key] for key in keys], dtype=np.float64
         )
+        return unique_scores[inverse.reshape(-1)]
+
+    def score_transformed_records(
+        self, transformed_records: np.ndarray
+    ) -> np.ndarray:
+        """Score a 2D integer array of transformed records in one batch.
+
+        If `scoring_workers` is higher than 1 the records are split into that many
+        contiguous shards, each scored on its own Julia thread with the same fitted model.
+        The scores are returned in the original row order.
+
+        :param transformed_records: 2D integer np.ndarray, one transformed record per row.
+        :returns np.ndarray of the individual uniqueness scores, one per row.
+        """
+        if self.fitted_model is None:
+            raise Exception("Please fit the model first.")
+        if transformed_records.shape[0] == 0:
+            return np.empty(0, dtype=np.float64)
+
+        transformed_records = np.ascontiguousarray(transformed_records)
+        n_shards = min(self.scoring_workers, transformed_records.shape[0])
+        if n_shards > 1:
+            scores = self.julia_sharded_score(
+                self.fitted_model, transformed_records, self.size, n_shards
+            )
+        else:
+            scores = self.julia_batch_score(
+                self.fitted_model, transformed_records, self.size
+            )
+        return np.asarray(scores, dtype=np.float64)
 
     def re_identify(
-        self, individual_uniqueness: float, pop_size: int = 0
-    ) -> float:
+        self,
+        individual_uniqueness: Union[float, np.ndarray],
+        pop_size: Union[int, np.ndarray] = 0,
+    ) -> Union[float, np.ndarray]:
         """Calculate the likelihood of re-identifcation given the individual uniqueness
 
-        :param individual_uniqueness: output of the get_individual_uniqueness
-        :param pop_size: the size of the population
-        :returns float result of the re-identifcation formula as described in the PCM paper
+        Works on single values or arrays. The two arguments are broadcast against each other,
+        so an array of scores of shape (n,) and an array of population sizes of shape (m, 1)
+        give an (m, n) array with one row per population size. The powers are computed in
+        log space with expm1, which keeps the result stable for scores close to 0 and 1.
+
+        :param individual_uniqueness: output of the get_individual_uniqueness, or an array of them
+        :param pop_size: the size of the population, or an array of them. 0 uses the size
+        of the fitted dataset.
+        :returns float result of the re-identifcation formula as described in the PCM paper,
+        or an np.ndarray if any of the arguments is an array
         """
-        if pop_size == 0:
+        pop_size = np.asarray(pop_size)
+        if (pop_size == 0).any():
             if self.size == 0:
                 raise Exception("Please fit model first")
-            pop_size = self.size
-        elif pop_size == 1:
+            pop_size = np.where(pop_size == 0, self.size, pop_size)
+        if (pop_size <= 1).any():
             raise ValueError("Population size has to be higher than 1.")
 
-        re_id = (1 / pop_size) * (
-            (1 - individual_uniqueness ** (pop_size / (pop_size - 1)))
-            / (1 - individual_uniqueness ** (1 / (pop_size - 1)))  # noqa: W503
-        )
+        uniqueness = np.asarray(individual_uniqueness, dtype=np.float64)
+        pop_size = pop_size.astype(np.float64)
+
+        # (1 - u^a) / (1 - u^b) == expm1(a * log(u)) / expm1(b * log(u)),
+        # which tends to pop_size as u tends to 1.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_uniqueness = np.log(uniqueness)
+            ratio = np.expm1(
+                log_uniqueness * pop_size / (pop_size - 1)
+            ) / np.expm1(log_uniqueness / (pop_size - 1))
+        re_id = np.where(uniqueness >= 1, 1.0, ratio / pop_size)
+
+        if re_id.ndim == 0:
+            return float(re_id)
         return re_id
+
+
+def hash_dataframe(df: pd.DataFrame) -> str:
+    """Hash the column names and values of a dataframe, used to key saved models.
+
+    :param df: pd.DataFrame to hash
+    :returns hex digest of the dataframe
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(df.columns.to_list()).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
@@ -1,4 +1,12 @@
 import re
+import pandas as pd
+
+from src.standardise_extraction.preprocess_functions.preprocess_functions import (
+    vectorised,
+)
+
+titles = ["Mrs", "Mr", "Ms", "Dr", "Prof", "Miss", "Doctor", "Patient"]
+title_pattern = r"^(?:" + "|".join(titles) + r")(?:\.\s)?(?:\.)?"
 
 
 def remove_titles(name: str):
@@ -11,8 +19,22 @@ def remove_titles(name: str):
         (str) : Returns a name that has had titles removed.
     """
 
-    titles = ["Mrs", "Mr", "Ms", "Dr", "Prof", "Miss", "Doctor", "Patient"]
-    pattern = r"^(?:" + "|".join(titles) + r")(?:\.\s)?(?:\.)?"
-    cleaned_name = re.sub(pattern, "", name, flags=re.IGNORECASE)
+    cleaned_name = re.sub(title_pattern, "", name, flags=re.IGNORECASE)
 
     return cleaned_name
+
+
+@vectorised
+def remove_titles_from_column(names: pd.Series) -> pd.Series:
+    """
+    Vectorised version of remove_titles, which cleans every extracted name of a column at once.
+
+    Args:
+        names (pd.Series): Entities that have been extracted from the model.
+
+    Returns:
+        pd.Series: Returns the names with titles removed.
+    """
+    return names.str.replace(
+        title_pattern, "", regex=True, flags=re.IGNORECASE
+    )
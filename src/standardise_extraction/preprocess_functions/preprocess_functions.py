@@ -1,9 +1,9 @@
 import pandas as pd
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Iterable
 
 
 def preprocess_extracted_output(
-    patient_entities: List[Dict[str, Any]],
+    patient_entities: Iterable[Dict[str, Any]],
     entities: List[str],
     cleaning_functions_per_entity: Dict[str, List[Callable]],
 ) -> pd.DataFrame:
@@ -13,7 +13,7 @@ def preprocess_extracted_output(
     from the extracted patient entities, applying the specified cleaning functions to each entity.
 
     Args:
-        patient_entities (List[Dict[str, Any]]): A list of dictionaries with a list of entities extract from each patient.
+        patient_entities (Iterable[Dict[str, Any]]): Dictionaries with a list of entities extract from each patient, read once.
         entities (List[str]): A list of entity names. These names correspond to keys in the dictionaries
                               contained in `patient_entities`.
         cleaning_functions_per_entity (Dict[str, List[Callable]]): A dictionary mapping entity names to lists of cleaning functions.
@@ -30,8 +30,24 @@ def preprocess_extracted_output(
     return df
 
 
+def vectorised(func: Callable) -> Callable:
+    """
+    Marks a cleaning function as vectorised. A vectorised cleaning function takes a pd.Series
+    of every extracted value of an entity, across all patients, and returns a pd.Series of the
+    cleaned values in the same order, instead of cleaning one value at a time.
+
+    Args:
+        func (Callable): A cleaning function that takes and returns a pd.Series.
+
+    Returns:
+        Callable: The same function, marked as vectorised.
+    """
+    func.vectorised = True
+    return func
+
+
 def create_df_from_patient_entities(
-    patient_entities: List[Dict[str, Any]],
+    patient_entities: Iterable[Dict[str, Any]],
     entity_list: List[str],
     cleaning_functions_per_entity: Dict[str, List[Callable]],
 ) -> pd.DataFrame:
@@ -39,8 +55,12 @@ def create_df_from_patient_entities(
     This function constructs a DataFrame from patient entities based on the specified
     list of entities and cleaning functions per entity.
 
+    The patient entities are read in a single pass, routing each entity by its label into
+    the values of its column, so patient_entities can be a lazy iterable. The cleaning
+    functions then run once per column, see clean_entity_values.
+
     Args:
-        patient_entities (List[Dict[str, Any]]): A list of dictionaries representing entities extracted out from each patient.
+        patient_entities (Iterable[Dict[str, Any]]): Dictionaries representing entities extracted out from each patient.
         entity_list (List[str]): A list of entity names to extract from the patient entities.
         cleaning_functions_per_entity (Dict[str, List[Callable]]): A dictionary mapping entity names to lists of cleaning functions.
 
@@ -49,19 +69,71 @@ def create_df_from_patient_entities(
                       and applying the corresponding cleaning functions.
 
     """
+    values_per_entity = {entity: [] for entity in entity_list}
+    patients_per_entity = {entity: [] for entity in entity_list}
+
+    n_patients = 0
+    for patient_num, patient_entity in enumerate(patient_entities):
+        for entity in patient_entity["Entities"]:
+            label = entity["label"]
+            if label in values_per_entity:
+                values_per_entity[label].append(entity["text"])
+                patients_per_entity[label].append(patient_num)
+        n_patients = patient_num + 1
 
     patient_data = dict()
 
     for entity in entity_list:
-        cleaning_functions = cleaning_functions_per_entity[entity]
-        entity_list = return_list_of_entities_from_patient_entities(
-            patient_entities, entity, cleaning_functions
+        cleaned_values = clean_entity_values(
+            values_per_entity[entity], cleaning_functions_per_entity[entity]
         )
-        patient_data[entity] = entity_list
+        column = [[] for _ in range(n_patients)]
+        for patient_num, value in zip(
+            patients_per_entity[entity], cleaned_values
+        ):
+            if value != "":
+                column[patient_num].append(value)
+        patient_data[entity] = column
 
     return pd.DataFrame(patient_data)
 
 
+def clean_entity_values(
+    values: List[Any], cleaning_functions: List[Callable] = list()
+) -> List[Any]:
+    """
+    Applies cleaning functions, in order, to every extracted value of one entity.
+
+    Functions marked with `vectorised` are called once with a pd.Series of all the values.
+    Other functions are called once per unique value, and the result is reused for repeated values.
+
+    Args:
+        values (List[Any]): The extracted values of one entity across all patients.
+        cleaning_functions (List[Callable], optional): Cleaning functions to apply. Defaults to an empty list.
+
+    Returns:
+        List[Any]: The cleaned values, in the order of values.
+    """
+    for func in cleaning_functions:
+        if getattr(func, "vectorised", False):
+            values = func(pd.Series(values, dtype=object)).tolist()
+            continue
+
+        cleaned = dict()
+        cleaned_values = []
+        for value in values:
+            try:
+                if value not in cleaned:
+                    cleaned[value] = func(value)
+                cleaned_values.append(cleaned[value])
+            except TypeError:
+                # Unhashable values, e.g. lists, are cleaned without the memo.
+                cleaned_values.append(func(value))
+        values = cleaned_values
+
+    return values
+
+
 def return_list_of_entities_from_patient_entities(
     patient_entities: List[Dict[str, Any]],
     entity_type: List[str],
@@ -1,10 +1,47 @@
+import re
+from datetime import datetime
+from functools import lru_cache
 from dateparser import parse
 import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+
+MONTHS = {
+    month: number
+    for number, names in enumerate(
+        [
+            ["january", "jan"],
+            ["february", "feb"],
+            ["march", "mar"],
+            ["april", "apr"],
+            ["may"],
+            ["june", "jun"],
+            ["july", "jul"],
+            ["august", "aug"],
+            ["september", "sep", "sept"],
+            ["october", "oct"],
+            ["november", "nov"],
+            ["december", "dec"],
+        ],
+        start=1,
+    )
+    for month in names
+}
+
+ISO_DATE_PATTERN = re.compile(
+    r"^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?$"
+)
+DMY_DATE_PATTERN = re.compile(r"^(\d{1,2})([/.-])(\d{1,2})\2(\d{4})$")
+ORDINAL_DATE_PATTERN = re.compile(
+    r"^(\d{1,2})(?:st|nd|rd|th)?(?:\s+of)?\s+([a-z]+)\.?,?\s+(\d{4})$",
+    flags=re.IGNORECASE,
+)
+
+DATE_TIERS = ["iso", "dmy", "ordinal", "dateparser", "unparsed"]
 
 
 def normalise_date_column(df: pd.DataFrame, column_name: str) -> pd.DataFrame:
     """Takes in the name of a column inside the dataframe and
-    transforms all dates in that column using date parser.
+    transforms all dates in that column, see normalise_dates.
 
     Args:
         df (pd.DataFrame): A dataframe with a date column we want to transform.
@@ -14,5 +51,83 @@ def normalise_date_column(df: pd.DataFrame, column_name: str) -> pd.DataFrame:
         pd.DataFrame: Returns a dataframe with the date column transformed.
     """
     df_copy = df.copy()
-    df_copy[column_name] = df_copy[column_name].astype(str).apply(parse)
+    df_copy[column_name], tier_counts = normalise_dates(df_copy[column_name])
+    print(
+        f"Dates in '{column_name}' parsed per tier: "
+        + ", ".join(f"{tier} {tier_counts[tier]}" for tier in DATE_TIERS)
+    )
     return df_copy
+
+
+def normalise_dates(values: pd.Series) -> Tuple[pd.Series, Dict[str, int]]:
+    """Parses a column of dates. Each unique string is parsed once, trying fast known formats
+    before falling back to dateparser, see parse_date.
+
+    Args:
+        values (pd.Series): The raw date values, which are converted to strings first.
+
+    Returns:
+        Tuple[pd.Series, Dict[str, int]]: The parsed dates, and the number of values parsed by each
+                                          tier in DATE_TIERS.
+    """
+    raw_values = values.astype(str)
+    parsed = {raw: parse_date(raw) for raw in raw_values.unique()}
+
+    tier_counts = {tier: 0 for tier in DATE_TIERS}
+    for raw, count in raw_values.value_counts(dropna=False).items():
+        tier_counts[parsed[raw][1]] += int(count)
+
+    dates = raw_values.map({raw: date for raw, (date, _) in parsed.items()})
+    return dates, tier_counts
+
+
+@lru_cache(maxsize=100_000)
+def parse_date(raw: Any) -> Tuple[Optional[datetime], str]:
+    """Parses a date string, trying in order:
+        - iso: ISO 8601 dates, e.g. "1985-03-12" or "1985-03-12T10:30:00".
+        - dmy: day first numeric dates, e.g. "12/03/1985", "12.03.1985" or "12-03-1985".
+        - ordinal: day month year dates, e.g. "12th March 1985", "12 Mar 1985" or "2nd of June 1990".
+        - dateparser: anything else dateparser can parse.
+
+    Results are cached, so repeated strings are only parsed once across calls.
+
+    Args:
+        raw (Any): The raw date, non strings are never parsed.
+
+    Returns:
+        Tuple[Optional[datetime], str]: The parsed date, or None, and the tier that parsed it.
+    """
+    if not isinstance(raw, str):
+        return None, "unparsed"
+
+    text = raw.strip()
+
+    if ISO_DATE_PATTERN.match(text):
+        try:
+            return datetime.fromisoformat(text), "iso"
+        except ValueError:
+            pass
+
+    match = DMY_DATE_PATTERN.match(text)
+    if match:
+        day, _, month, year = match.groups()
+        try:
+            return datetime(int(year), int(month), int(day)), "dmy"
+        except ValueError:
+            pass
+
+    match = ORDINAL_DATE_PATTERN.match(text)
+    if match and match.group(2).lower() in MONTHS:
+        day, month, year = match.groups()
+        try:
+            return (
+                datetime(int(year), MONTHS[month.lower()], int(day)),
+                "ordinal",
+            )
+        except ValueError:
+            pass
+
+    date = parse(raw)
+    if date is None:
+        return None, "unparsed"
+    return date, "dateparser"
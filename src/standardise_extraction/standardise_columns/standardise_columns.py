@@ -1,8 +1,7 @@
+import numpy as np
 import pandas as pd
 
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import LabelEncoder
-from typing import Tuple, Dict, List, Callable
+from typing import Any, Tuple, Dict, List, Callable, Optional
 
 
 def standardise_preprocess_output(
@@ -22,15 +21,34 @@ def standardise_preprocess_output(
                                                         with an encoded lookup dictionary to help transform results back.
     """
 
-    for column_name, functions in standardise_functions_per_entity.items():
-        for func in functions:
-            df = func(df, column_name)
+    df = apply_standardise_functions(df, standardise_functions_per_entity)
 
     encoded_output, lookup = encode(df)
 
     return [encoded_output, lookup]
 
 
+def apply_standardise_functions(
+    df: pd.DataFrame,
+    standardise_functions_per_entity: Dict[str, List[Callable]] = dict(),
+) -> pd.DataFrame:
+    """For each given column name provided in the standardise_functions_per_entity dictionary,
+        it applies the functions given to that column, without encoding the result.
+
+    Args:
+        df (pd.DataFrame): This is a dataframe we want to transform given columns on.
+        standardise_functions_per_entity (Dict[str, Any], optional): This is a dictionary of column names to a function
+                                                                     that can be applied across columns. Defaults to dict().
+
+    Returns:
+        pd.DataFrame: Returns the dataframe with its columns standardised.
+    """
+    for column_name, functions in standardise_functions_per_entity.items():
+        for func in functions:
+            df = func(df, column_name)
+    return df
+
+
 def extract_first_entity_from_list(df: pd.DataFrame, column_name: str):
     """
     For the given column_name it extracts the first entity from the list of row value inputs.
@@ -64,96 +82,77 @@ def extract_first_entity(input: List[str]):
         return None
 
 
-def encode(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]:
+def encode(
+    df: pd.DataFrame,
+    lookup: Optional[Dict[str, Dict[Any, int]]] = None,
+    as_str: bool = False,
+) -> Tuple[pd.DataFrame, Dict[str, Dict[Any, int]]]:
     """
     Encode a dataset for processing by pycorrectmatch
 
+    Missing values are filled with 0 and columns holding more than one type of value are
+    converted to strings. Each column is then encoded to int32 codes in one pass with
+    np.unique, so the codes of a new lookup follow the sorted order of the values.
+
+    If a lookup from an earlier call is given, values already in it keep their code and new
+    values are given the next free codes, so data can be encoded incrementally. The keys of the
+    lookup and the values are then all converted with str, so a value has the same key whatever
+    the dtype of the chunk it comes in, e.g. the 0 filled in for missing values. The returned
+    lookup has str keys.
+
     Args:
         df (pd.DataFrame): This is a dataframe we want to encode column values.
+        lookup (Optional[Dict[str, Dict[Any, int]]], optional): Lookup returned by an earlier call to extend.
+                                                                Defaults to None, which creates a new lookup.
+        as_str (bool, optional): Convert every value with str before encoding, as is always done when a lookup
+                                 is given. Use it for the first of several chunks, so its lookup already has
+                                 str keys. Defaults to False.
 
     Returns:
-        Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]: Table of encoded data and lookup dictionary.
+        Tuple[pd.DataFrame, Dict[str, Dict[Any, int]]]: Table of encoded data and lookup dictionary.
     """
-
     output = df.fillna(0)
+    as_str = as_str or lookup is not None
+    new_lookup = dict()
+    for col, col_lookup in (lookup or dict()).items():
+        new_lookup[col] = dict()
+        for key, code in col_lookup.items():
+            new_lookup[col].setdefault(str(key), code)
+    lookup = new_lookup
+
+    encoded_columns = dict()
     for col in output.columns:
-        if len(set([type(i) for i in output[col].tolist()])) > 1:
-            output[col] = output[col].astype("str")
-    ct = ColumnTransformer(
-        [
-            (f"encode_{col_name}", PipelineLabelEncoder(), col_name)
-            for col_name in output.columns
-        ]
-    )
-    encoded_output = pd.DataFrame(
-        ct.fit_transform(output), index=output.index, columns=output.columns
-    )
-    transformers = {k: j for i, j, k in ct.transformers_}
-    lookup = {
-        i: {k: j for j, k in enumerate(transformers[i].classes_)}
-        for i in output.columns
-    }
+        values = output[col]
+        col_lookup = lookup.setdefault(col, dict())
+        if as_str:
+            values = values.map(str)
+        elif is_mixed_type(values):
+            values = values.astype("str")
+
+        classes, inverse = np.unique(values.to_numpy(), return_inverse=True)
+        for value in classes:
+            if value not in col_lookup:
+                col_lookup[value] = len(col_lookup)
+        class_codes = np.array(
+            [col_lookup[value] for value in classes], dtype=np.int32
+        )
+        encoded_columns[col] = class_codes[inverse.reshape(-1)]
+
+    encoded_output = pd.DataFrame(encoded_columns, index=output.index)
     return encoded_output, lookup
 
 
-class PipelineLabelEncoder(LabelEncoder):
+def is_mixed_type(values: pd.Series) -> bool:
     """
-    Extends the sklearn LabelEncoder class for use in scikit-learn pipelines.
-
-    This class provides methods to fit and transform labels, suitable for use within
-    scikit-learn pipelines.
-
-    Methods:
-        fit_transform(self, y, _) -> Transform labels into normalized integers and reshape the result.
-        transform(self, y, _) -> Transform labels into normalized integers and reshape the result.
-
-    Example Usage:
-        # Create an instance of PipelineLabelEncoder
-        encoder = PipelineLabelEncoder()
+    Checks whether a column holds values of more than one type, e.g. strings and the 0 used
+    to fill missing values, which cannot be sorted together.
 
-        # Fit and transform labels
-        encoded_labels = encoder.fit_transform(["a", "b", "c"])
+    Args:
+        values (pd.Series): A column of a dataframe.
 
-        # Transform new labels using fitted encoder
-        new_encoded_labels = encoder.transform(["b", "c", "d"])
+    Returns:
+        bool: Whether the column holds more than one type of value.
     """
-
-    def fit_transform(self, y, _, *args, **kwargs):
-        """
-        Fit the encoder to the labels and transform them into normalized integers.
-
-        Args:
-            y : array-like of shape (n_samples,)
-                The target variable to encode.
-            _ : Ignored
-                Placeholder parameter to match the sklearn interface.
-            *args : Additional positional arguments
-                Additional arguments to pass to the parent class method.
-            **kwargs : Additional keyword arguments
-                Additional keyword arguments to pass to the parent class method.
-
-        Returns:
-            transformed_y : ndarray of shape (n_samples, 1)
-                The transformed labels, reshaped to a column vector.
-        """
-        return super().fit_transform(y, *args, **kwargs).reshape(-1, 1)
-
-    def transform(self, y, _, *args, **kwargs):
-        """
-        Transform labels into normalized integers and reshape the result.
-
-        Args:
-            y : array-like of shape (n_samples,)
-                The target variable to encode.
-            _ : Ignored
-                Placeholder parameter to match the sklearn interface.
-            *args : Additional positional arguments
-                Additional arguments to pass to the parent class method.
-            **kwargs : Additional keyword arguments
-                Additional keyword arguments to pass to the parent class method.
-
-        Returns:
-            transformed_y : ndarray of shape (n_samples, 1)
-                The transformed labels, reshaped to a column vector.
-        """
-        return super().transform(y, *args, **kwargs).reshape(-1, 1)
+    if values.dtype != object:
+        return False
+    return pd.api.types.infer_dtype(values, skipna=False).startswith("mixed")
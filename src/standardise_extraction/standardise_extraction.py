@@ -1,17 +1,23 @@
 import pandas as pd
-from typing import List, Dict, Any, Optional
+import pyarrow as pa
+from typing import List, Dict, Any, Optional, Iterable
 
 from src.standardise_extraction.preprocess_functions.preprocess_functions import (
     preprocess_extracted_output,
 )
 from src.standardise_extraction.standardise_columns.standardise_columns import (
-    standardise_preprocess_output,
+    apply_standardise_functions,
+    encode,
 )
 
 from src.utils import (
     load_json_from_path_or_variable,
-    save_dataframe_to_csv,
-    load_dataframe_from_csv,
+    check_variable_path_state,
+    JsonlRecords,
+    save_dataframe,
+    load_dataframe,
+    iter_batches,
+    DataFrameAppender,
 )
 from src.standardise_extraction.preprocess_functions import clean_name
 from src.standardise_extraction.standardise_columns.standardise_columns import (
@@ -22,7 +28,9 @@ from src.standardise_extraction.standardise_columns import normalise_columns
 from src.old_config import entity_list
 
 
-extra_preprocess_functions_per_entity = {"person": [clean_name.remove_titles]}
+extra_preprocess_functions_per_entity = {
+    "person": [clean_name.remove_titles_from_column]
+}
 standardise_functions_per_entity = {
     "person": [extract_first_entity_from_list],
     "nhs number": [extract_first_entity_from_list],
@@ -34,6 +42,68 @@ standardise_functions_per_entity = {
 }
 
 
+def get_standardised_schema() -> pa.Schema:
+    """Arrow schema of the standardised dataframe: a timestamp for entities normalised to dates
+    and a string for every other entity.
+
+    Returns:
+        pa.Schema: One field per entity in entity_list.
+    """
+    return pa.schema(
+        [
+            (
+                entity,
+                (
+                    pa.timestamp("us")
+                    if normalise_columns.normalise_date_column
+                    in standardise_functions_per_entity.get(entity, [])
+                    else pa.string()
+                ),
+            )
+            for entity in entity_list
+        ]
+    )
+
+
+def get_encoded_schema() -> pa.Schema:
+    """Arrow schema of the encoded dataframe, an int32 code per entity.
+
+    Returns:
+        pa.Schema: One field per entity in entity_list.
+    """
+    return pa.schema([(entity, pa.int32()) for entity in entity_list])
+
+
+def standardise_patient_entities(
+    patient_entities: Iterable[Dict[str, Any]],
+) -> pd.DataFrame:
+    """Preprocesses the patient records into one column per entity, then standardises the
+    columns, before encoding.
+
+    Args:
+        patient_entities (Iterable[Dict[str, Any]]): Dictionaries with an Entities property, read once.
+
+    Returns:
+        pd.DataFrame: The standardised dataframe.
+    """
+    empty_functions = [[] for i in entity_list]
+    preprocess_functions_per_entity = dict(zip(entity_list, empty_functions))
+
+    preprocess_functions_per_entity.update(
+        extra_preprocess_functions_per_entity
+    )
+
+    # This preprocesses entities extracted from the extraction process.
+    df = preprocess_extracted_output(
+        patient_entities,
+        entity_list,
+        preprocess_functions_per_entity,
+    )
+
+    # This standardises columns that have been extracted out from the dataframe.
+    return apply_standardise_functions(df, standardise_functions_per_entity)
+
+
 class StandardiseExtraction:
     """This standardises the outputs from the extraction part ready for pycorrect match."""
 
@@ -43,64 +113,130 @@ class StandardiseExtraction:
         extraction_path: Optional[str] = None,
         save_output: Optional[bool] = False,
         path_output: Optional[str] = None,
+        standardised_path: Optional[str] = None,
+        chunk_size: Optional[int] = None,
     ):
         """Self-defined arguments
 
         Args:
             extraction_input (Optional[List[Dict[str, Any]]], optional): This is a list of dictionaries with an entities property with a
                                                                          list of dictionary for each entity extracted. Defaults to None.
-            extraction_path (Optional[str], optional): This is the path to a list of dictionaries. Defaults to None.
+            extraction_path (Optional[str], optional): This is the path to a list of dictionaries, either a JSON file or a
+                                                       JSONL file with one dictionary per line, which is read lazily.
+                                                       Defaults to None.
             save_output (Optional[bool], optional): This determines whether the extraction JSON is saved to path_output. Defaults to False.
-            path_output (Optional[str], optional): This provides the path of where the JSON extraction output should sit. Defaults to None.
+            path_output (Optional[str], optional): This provides the path of where the encoded output should sit. The format is chosen
+                                                   by the extension: .parquet, .feather or .csv. Defaults to None.
+            standardised_path (Optional[str], optional): If given with save_output, the standardised dataframe before encoding is
+                                                         also saved here, in the same choice of formats. Parquet or Feather keep
+                                                         its datetime columns. Defaults to None.
+            chunk_size (Optional[int], optional): If given, patient records are standardised chunk_size at a time and each
+                                                  chunk is appended to path_output, so the whole extraction never sits in
+                                                  memory. Needs save_output and path_output, and a JSONL extraction_path to
+                                                  also read the records lazily. Defaults to None.
         """
         self.extraction_input = extraction_input
         self.extraction_path = extraction_path
         self.save_output = save_output
         self.path_output = path_output
+        self.standardised_path = standardised_path
+        self.chunk_size = chunk_size
+        self.lookup = None
 
     def run(self) -> pd.DataFrame:
         """Returns a dataframe of the first entitiy extracted from each entity type given
            for each medical note given.
 
+        The encoding lookup is kept in self.lookup. In chunked mode it is shared by every
+        chunk, so a value has the same code in every chunk.
+
         Returns:
             pd.DataFrame: Dataframe of the first entity extracted for a given entity type.
         """
-        patient_entities = load_json_from_path_or_variable(
-            self.extraction_input, self.extraction_path
-        )
-
-        empty_functions = [[] for i in entity_list]
-        preprocess_functions_per_entity = dict(
-            zip(entity_list, empty_functions)
-        )
-
-        preprocess_functions_per_entity.update(
-            extra_preprocess_functions_per_entity
-        )
-
-        # This preprocesses entities extracted from the extraction process.
-        df = preprocess_extracted_output(
-            patient_entities,
-            entity_list,
-            preprocess_functions_per_entity,
-        )
-
-        # This standardises columns that have been extracted out from the dataframe.
-        standardised_df, _ = standardise_preprocess_output(
-            df, standardise_functions_per_entity
-        )
+        check_variable_path_state(self.extraction_input, self.extraction_path)
+        if self.extraction_input is None and self.extraction_path.endswith(
+            ".jsonl"
+        ):
+            patient_entities = JsonlRecords(self.extraction_path)
+        else:
+            patient_entities = load_json_from_path_or_variable(
+                self.extraction_input, self.extraction_path
+            )
+
+        if self.chunk_size is not None:
+            return self.run_chunked(patient_entities)
+
+        standardised_df = standardise_patient_entities(patient_entities)
+        encoded_df, self.lookup = encode(standardised_df)
 
         if self.save_output:
-            save_dataframe_to_csv(standardised_df, self.path_output)
+            save_dataframe(encoded_df, self.path_output)
+            if self.standardised_path is not None:
+                save_dataframe(standardised_df, self.standardised_path)
 
         # This converts the values into a numpy array
-        return standardised_df
+        return encoded_df
+
+    def run_chunked(
+        self, patient_entities: Iterable[Dict[str, Any]]
+    ) -> pd.DataFrame:
+        """Standardises and encodes the patient records chunk_size at a time, appending each
+        encoded chunk to path_output, and the standardised chunk to standardised_path if set.
+
+        Every chunk is encoded against one global lookup, with values converted to strings so
+        the lookup keys have the same type in every chunk. Chunks are written with the schemas
+        from get_standardised_schema and get_encoded_schema, so a column that is empty in the first
+        chunk keeps its type, and with no patient records the files only hold the entity columns.
+
+        Args:
+            patient_entities (Iterable[Dict[str, Any]]): The patient records, read once.
+
+        Raises:
+            ValueError: If save_output or path_output are not set.
+
+        Returns:
+            pd.DataFrame: The encoded output read back from path_output, memory mapped if it is Parquet or Feather.
+        """
+        if not self.save_output or self.path_output is None:
+            raise ValueError(
+                "Chunked standardisation writes its output to file, set save_output and path_output."
+            )
+
+        self.lookup = dict()
+        standardised_appender = None
+        if self.standardised_path is not None:
+            standardised_appender = DataFrameAppender(
+                self.standardised_path, schema=get_standardised_schema()
+            )
+
+        try:
+            with DataFrameAppender(
+                self.path_output, schema=get_encoded_schema()
+            ) as encoded_appender:
+                for n_chunks, chunk in enumerate(
+                    iter_batches(patient_entities, self.chunk_size), start=1
+                ):
+                    standardised_df = standardise_patient_entities(chunk)
+                    encoded_df, self.lookup = encode(
+                        standardised_df, self.lookup, as_str=True
+                    )
+                    encoded_appender.append(encoded_df)
+                    if standardised_appender is not None:
+                        standardised_appender.append(standardised_df)
+                    print(
+                        f"Standardised chunk {n_chunks}: {len(chunk)} patient records."
+                    )
+        finally:
+            if standardised_appender is not None:
+                standardised_appender.close()
+
+        return self.load()
 
     def load(self) -> pd.DataFrame:
-        """Loads the standardised dataframe from file.
+        """Loads the standardised dataframe from file, memory mapped if it was saved as Parquet or Feather.
 
         Returns:
             pd.DataFrame: Dataframe of the first entity extracted for a given entity type.
         """
-        standardised_df = load_dataframe_from_csv(self.path_output)
+        standardised_df = load_dataframe(self.path_output)
         return standardised_df
@@ -1,7 +1,23 @@
 import os
 import json
+import asyncio
+import numpy as np
 import pandas as pd
-from typing import Union, List, Dict, Any
+import itertools
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Union,
+    List,
+    Dict,
+    Any,
+    Coroutine,
+    Iterator,
+    Iterable,
+    Optional,
+)
 
 from huggingface_hub import hf_hub_download
 
@@ -67,6 +83,100 @@ def load_json(
     return output
 
 
+def get_jsonl_path(path: str) -> str:
+    """Returns the path of the JSONL file that sits next to a JSON output path.
+
+    Args:
+        path (str): Path to a JSON output, e.g. ../outputs/generate/generate_0.json
+
+    Returns:
+        str: The same path with a .jsonl extension, e.g. ../outputs/generate/generate_0.jsonl
+    """
+    return os.path.splitext(path)[0] + ".jsonl"
+
+
+def append_jsonl(data: Dict[str, Any], path: str) -> None:
+    """Appends one json serialisable record as a line to a JSONL file, flushing it
+    to disk straight away so it survives a crash.
+
+    Args:
+        data (Dict[str, Any]): The record to append.
+        path (str): String to define the path location.
+
+    Raises:
+        ValueError: If path is undefined.
+    """
+    if path is None:
+        raise ValueError("The path variable has not been set")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(data) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily reads the records of a JSONL file one line at a time. A final line
+    that was only partly written, e.g. because of a crash, is skipped.
+
+    Args:
+        path (str): String to define the path location.
+
+    Raises:
+        ValueError: If path is undefined.
+
+    Yields:
+        Iterator[Dict[str, Any]]: Each record in the file.
+    """
+    if path is None:
+        raise ValueError("The path variable has not been set")
+
+    with open(path) as file:
+        for line in file:
+            if not line.endswith("\n"):
+                return
+            if line.strip():
+                yield json.loads(line)
+
+
+def repair_jsonl(path: str) -> int:
+    """Removes a final line that was only partly written, e.g. because of a crash, so that
+    records appended afterwards start on a new line, and counts the complete records.
+
+    Args:
+        path (str): String to define the path location.
+
+    Returns:
+        int: Number of complete records in the file, 0 if the file does not exist.
+    """
+    if not file_exists(path):
+        return 0
+
+    with open(path, "rb+") as file:
+        content = file.read()
+        complete_size = content.rfind(b"\n") + 1
+        if complete_size < len(content):
+            file.truncate(complete_size)
+
+    return sum(1 for _ in iter_jsonl(path))
+
+
+class JsonlRecords:
+    """Lazy view of the records in a JSONL file. Each iteration reads the file again one
+    line at a time, so the records never all sit in memory at once."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): String to define the path location.
+        """
+        self.path = path
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter_jsonl(self.path)
+
+
 def check_variable_path_state(
     from_variable: Union[List[str], Dict[str, int], List[Dict[str, int]]],
     from_path: str,
@@ -137,6 +247,159 @@ def load_dataframe_from_csv(path: str) -> pd.DataFrame:
     return dataframe
 
 
+PARQUET_EXTENSIONS = [".parquet", ".pq"]
+FEATHER_EXTENSIONS = [".feather", ".arrow"]
+
+
+def save_dataframe(dataframe: pd.DataFrame, path: str) -> None:
+    """
+    Save a pandas DataFrame, choosing the format from the extension of path: Parquet for
+    .parquet or .pq, Arrow IPC (Feather) for .feather or .arrow, and CSV otherwise.
+
+    Parquet and Feather keep the column dtypes, including categorical and datetime columns,
+    so nothing has to be parsed again when the file is loaded.
+
+    Args:
+        dataframe (pd.DataFrame): The pandas DataFrame to be saved.
+        path (str): The filename to save to.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        dataframe.to_parquet(path, engine="pyarrow", index=False)
+    elif extension in FEATHER_EXTENSIONS:
+        dataframe.reset_index(drop=True).to_feather(path)
+    else:
+        save_dataframe_to_csv(dataframe, path)
+
+
+def load_dataframe(path: str) -> pd.DataFrame:
+    """
+    Load a pandas DataFrame saved with save_dataframe, choosing the format from the extension
+    of path. Parquet and Feather files are read through a memory map.
+
+    Args:
+        path (str): The filename to load from.
+
+    Returns:
+        pd.DataFrame: The loaded DataFrame.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        table = pq.read_table(path, memory_map=True)
+    elif extension in FEATHER_EXTENSIONS:
+        table = feather.read_table(path, memory_map=True)
+    else:
+        return load_dataframe_from_csv(path)
+    return table.to_pandas()
+
+
+class DataFrameAppender:
+    """
+    Writes a DataFrame to a file one chunk at a time, in the format chosen by the extension
+    of path like save_dataframe. CSV chunks are appended with the header written once, Parquet
+    chunks are written as row groups with a ParquetWriter and Feather chunks as record batches
+    of one Arrow IPC file.
+
+    Parquet and Feather chunks are all converted to one Arrow schema. Pass schema when the column
+    types are known, otherwise the schema of the first chunk is used, with columns that are empty
+    in the first chunk stored as strings.
+
+    Usage:
+        with DataFrameAppender(path) as appender:
+            for chunk in chunks:
+                appender.append(chunk)
+    """
+
+    def __init__(self, path: str, schema: Optional[pa.Schema] = None) -> None:
+        """
+        Args:
+            path (str): The filename to write to, an existing file is overwritten.
+            schema (Optional[pa.Schema], optional): Arrow schema of the Parquet or Feather file, also
+                                                    used for the header of an empty file. Defaults to None.
+        """
+        self.path = path
+        self.extension = os.path.splitext(path)[1].lower()
+        self.writer = None
+        self.schema = schema
+        self.n_chunks = 0
+
+    def append(self, dataframe: pd.DataFrame) -> None:
+        """
+        Writes one chunk to the end of the file.
+
+        Args:
+            dataframe (pd.DataFrame): The chunk, with the same columns as the first chunk.
+        """
+        if self.extension in PARQUET_EXTENSIONS + FEATHER_EXTENSIONS:
+            table = pa.Table.from_pandas(
+                dataframe, schema=self.schema, preserve_index=False
+            )
+            if self.schema is None:
+                # An all null column has type null, which later chunks can not be cast to.
+                self.schema = pa.schema(
+                    [
+                        (
+                            field.with_type(pa.string())
+                            if pa.types.is_null(field.type)
+                            else field
+                        )
+                        for field in table.schema
+                    ],
+                    metadata=table.schema.metadata,
+                )
+            table = table.cast(self.schema)
+            if self.writer is None:
+                if self.extension in PARQUET_EXTENSIONS:
+                    self.writer = pq.ParquetWriter(self.path, self.schema)
+                else:
+                    self.writer = pa.ipc.new_file(self.path, self.schema)
+            self.writer.write_table(table)
+        else:
+            dataframe.to_csv(
+                self.path,
+                index=False,
+                mode="w" if self.n_chunks == 0 else "a",
+                header=self.n_chunks == 0,
+            )
+        self.n_chunks += 1
+
+    def close(self) -> None:
+        """Finishes the file, which Parquet and Feather need to be readable. If no chunk was
+        appended and schema is set, an empty file with the columns of schema is written.
+        """
+        if self.n_chunks == 0 and self.schema is not None:
+            self.append(self.schema.empty_table().to_pandas())
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self) -> "DataFrameAppender":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def iter_batches(
+    iterable: Iterable[Any], batch_size: int
+) -> Iterator[List[Any]]:
+    """Lazily splits an iterable into lists of batch_size items, the last one can be shorter.
+
+    Args:
+        iterable (Iterable[Any]): The items to split, e.g. JsonlRecords.
+        batch_size (int): The number of items in each batch.
+
+    Yields:
+        Iterator[List[Any]]: Each batch.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
 def create_folder_if_not_exists(folder_path: str) -> None:
     """
     Create a folder if it doesn't exist.
@@ -178,3 +441,62 @@ def download_llm_model_from_hf(repo_id: str, filename: str):
         print(
             f"The file '{filename}' already exists in '{model_folder}'. Skipping download."
         )
+
+
+def run_coroutine(coroutine: Coroutine) -> Any:
+    """Runs a coroutine to completion, also when called from inside a running
+    event loop such as a Jupyter notebook.
+
+    Args:
+        coroutine (Coroutine): The coroutine to run.
+
+    Returns:
+        Any: The result of the coroutine.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # asyncio.run cannot be nested, so run it on a separate thread instead.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def summarise_latencies(
+    latencies: List[float],
+    elapsed_seconds: float,
+    unit: str = "requests",
+    failed: int = 0,
+) -> Dict[str, float]:
+    """Summarises the latencies of a set of requests as throughput and percentiles,
+    and prints the summary.
+
+    Args:
+        latencies (List[float]): Latency of each request in seconds.
+        elapsed_seconds (float): Wall clock time taken by all the requests.
+        unit (str, optional): Name of what was produced, used in the printed summary. Defaults to "requests".
+        failed (int, optional): Number of requests that failed, which have no latency. Defaults to 0.
+
+    Returns:
+        Dict[str, float]: Count, failed count, throughput per second and p50, p90 and p99 latencies in seconds.
+    """
+    stats = {"count": len(latencies), "failed": failed}
+    if len(latencies) == 0:
+        if failed:
+            print(f"0 {unit}, {failed} failed")
+        return stats
+
+    stats[f"{unit}_per_sec"] = len(latencies) / max(elapsed_seconds, 1e-9)
+    for percentile in [50, 90, 99]:
+        stats[f"p{percentile}_latency"] = float(
+            np.percentile(latencies, percentile)
+        )
+
+    print(
+        f"{stats['count']} {unit} in {elapsed_seconds:.2f}s "
+        f"({stats[f'{unit}_per_sec']:.2f} {unit}/sec), latency "
+        f"p50 {stats['p50_latency']:.2f}s, p90 {stats['p90_latency']:.2f}s, "
+        f"p99 {stats['p99_latency']:.2f}s, {failed} failed"
+    )
+    return stats